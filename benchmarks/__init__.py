@@ -0,0 +1 @@
+"""Benchmarks for mkdocstrings-crystal, on synthetic doc trees."""
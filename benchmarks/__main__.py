@@ -0,0 +1,301 @@
+"""Run the benchmarks and compare them against the stored baseline.
+
+python -m benchmarks [--scale default] [--save] [--threshold 1.5] [NAME ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import io
+import json
+import os
+import sys
+import timeit
+from typing import Callable
+
+from mkdocstrings_handlers.crystal import crystal_html, inventory, snapshot
+from mkdocstrings_handlers.crystal.collector import DocView
+from mkdocstrings_handlers.crystal.items import DocItem, DocMethod, DocType
+
+from . import harness, synthetic
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+_BENCHMARKS: dict[str, Callable[[bytes], Callable[[], object]]] = {}
+
+
+def benchmark(func: Callable[[bytes], Callable[[], object]]):
+    """Register a benchmark: a function that does the setup and returns the function to time."""
+    _BENCHMARKS[func.__name__.removeprefix("bench_")] = func
+    return func
+
+
+def _all_items(root: DocType) -> list[DocItem]:
+    items: list[DocItem] = []
+    for typ in [root, *root.walk_types()]:
+        items.append(typ)
+        items += typ.constants
+        for mapp in (typ.constructors, typ.class_methods, typ.instance_methods, typ.macros):
+            items += mapp
+    return items
+
+
+def _all_methods(root: DocType) -> list[DocMethod]:
+    return [item for item in _all_items(root) if isinstance(item, DocMethod)]
+
+
+@benchmark
+def bench_inventory_read(json_data: bytes):
+    return lambda: inventory.read(io.BytesIO(json_data))
+
+
+def _bench_decode(decoder: str):
+    def bench(json_data: bytes):
+        return lambda: inventory.loads(json_data, decoder)
+
+    bench.__name__ = f"decode_{decoder}"
+    return bench
+
+
+for _decoder in inventory.DECODERS:
+    benchmark(_bench_decode(_decoder))
+
+
+@benchmark
+def bench_materialize(json_data: bytes):
+    return lambda: _all_items(inventory.read(io.BytesIO(json_data)))
+
+
+@benchmark
+def bench_materialize_all(json_data: bytes):
+    def run():
+        snapshot.materialize(harness.make_root(json_data))
+
+    return run
+
+
+@benchmark
+def bench_snapshot_load(json_data: bytes):
+    root = harness.make_root(json_data)
+    snapshot.materialize(root)
+    path = harness.temp_file(".pickle")
+    snapshot.save(path, "key", root)
+    return lambda: snapshot.load(path, "key")
+
+
+@benchmark
+def bench_fingerprint(json_data: bytes):
+    return lambda: harness.make_root(json_data).fingerprint
+
+
+@benchmark
+def bench_used_by_index(json_data: bytes):
+    root = harness.make_root(json_data)
+    types = list(root.walk_types())
+    for meth in _all_methods(root):
+        meth.args_string  # noqa: B018
+
+    def run():
+        vars(root).pop("_used_by_index", None)
+        for typ in types:
+            typ.used_by  # noqa: B018
+
+    return run
+
+
+@benchmark
+def bench_lookup(json_data: bytes):
+    root = harness.make_root(json_data)
+    items = _all_items(root)
+    identifiers = [item.abs_id for item in items if item is not root]
+    # Also relative lookups, which have to fall back to the parent namespace.
+    relative = [(item, item.name) for item in items if isinstance(item, DocType) and item.parent]
+
+    def run():
+        for identifier in identifiers:
+            root.lookup(identifier)
+        for item, name in relative:
+            item.lookup(name)
+
+    return run
+
+
+@benchmark
+def bench_suggest(json_data: bytes):
+    root = harness.make_root(json_data)
+    # Misspellings of a sample of identifiers, each losing one character.
+    items = _all_items(root)[1::50]
+    queries = [item.abs_id[:3] + item.abs_id[4:] for item in items]
+    root.suggest("")
+
+    def run():
+        for query in queries:
+            root.suggest(query)
+
+    return run
+
+
+@benchmark
+def bench_docview_filter(json_data: bytes):
+    root = harness.make_root(json_data)
+    types = [root, *root.walk_types()]
+    config = {"nested_types": True, "file_filters": ["src/", "!_spec"]}
+
+    def run():
+        for typ in types:
+            view = DocView(typ, config)
+            for attr in ("types", "constants", "constructors", "instance_methods"):
+                getattr(view, attr)
+
+    return run
+
+
+@benchmark
+def bench_parse_crystal_html(json_data: bytes):
+    root = harness.make_root(json_data)
+    htmls = [m.data["args_html"] for m in _all_methods(root)]
+
+    def run():
+        for html in htmls:
+            crystal_html.parse_crystal_html(html)
+
+    return run
+
+
+@benchmark
+def bench_linkify_highlighted_html(json_data: bytes):
+    handler = harness.make_handler(json_data)
+    root = handler.root
+    highlight = handler.env.filters["highlight"]
+    sigs = [crystal_html.parse_crystal_html(m.data["args_html"]) for m in _all_methods(root)]
+    pairs = [(highlight(str(s), language="crystal", inline=True), s.tokens) for s in sigs]
+    make_link = lambda path, text: text
+
+    def run():
+        for html, tokens in pairs:
+            crystal_html.linkify_highlighted_html(html, tokens, make_link)
+
+    return run
+
+
+@benchmark
+def bench_render(json_data: bytes):
+    handler = harness.make_handler(json_data, incremental=False)
+    root = handler.root
+    # Rendering is by far the slowest, so take just a sample of the types.
+    identifiers = [typ.abs_id for typ in root.walk_types()][:20]
+
+    def run():
+        for identifier in identifiers:
+            handler.render(handler.collect(identifier, {}), {})
+            handler._headings.clear()
+
+    return run
+
+
+@benchmark
+def bench_render_compact(json_data: bytes):
+    handler = harness.make_handler(json_data, incremental=False)
+    items = [handler.collect(typ.abs_id, {}) for typ in list(handler.root.walk_types())[:20]]
+
+    # Also compare the size of the HTML against the default mode.
+    sizes = [
+        sum(len(handler.render(item, {"compact_html": compact})) for item in items)
+        for compact in (False, True)
+    ]
+    handler._headings.clear()
+    print(
+        f"render_compact: {sizes[0] / 1000:.0f} kB of HTML, {sizes[1] / 1000:.0f} kB compact"
+        f" ({sizes[1] / sizes[0] - 1:+.0%})",
+        file=sys.stderr,
+    )
+
+    def run():
+        for item in items:
+            handler.render(item, {"compact_html": True})
+            handler._headings.clear()
+
+    return run
+
+
+@benchmark
+def bench_render_large_enum(json_data: bytes):
+    data = json.loads(json_data)
+    members = [
+        {"id": f"MEMBER_{i}", "name": f"MEMBER_{i}", "value": str(i), "doc": f"Member *{i}*."}
+        for i in range(1000)
+    ]
+    enum = {**data["program"]["types"][0], "name": "LargeEnum", "full_name": "LargeEnum"}
+    enum.update(kind="enum", constants=members, types=[])
+    data["program"]["types"].append(enum)
+    handler = harness.make_handler(json.dumps(data).encode(), incremental=False)
+    item = handler.collect("LargeEnum", {})
+
+    def run():
+        handler.render(item, {})
+        handler._headings.clear()
+
+    return run
+
+
+@dataclasses.dataclass
+class _Result:
+    name: str
+    seconds: float
+    baseline: float | None
+
+    @property
+    def ratio(self) -> float | None:
+        return self.seconds / self.baseline if self.baseline else None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("names", nargs="*", choices=[[], *_BENCHMARKS], metavar="NAME")
+    parser.add_argument("--scale", choices=synthetic.SCALES, default="default")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="fail if a benchmark is slower than the baseline by this factor",
+    )
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    args = parser.parse_args()
+
+    try:
+        with open(BASELINE_FILE) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+    baseline = baselines.setdefault(args.scale, {})
+
+    json_data = synthetic.generate_json(synthetic.SCALES[args.scale])
+    print(f"Scale {args.scale!r}: {len(json_data) / 1e6:.1f} MB of JSON", file=sys.stderr)
+
+    results = []
+    for name in args.names or _BENCHMARKS:
+        func = _BENCHMARKS[name](json_data)
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        result = _Result(name, seconds, baseline.get(name))
+        results.append(result)
+
+        line = f"{name:<30} {seconds * 1000:10.2f} ms"
+        if result.ratio is not None:
+            line += f"   {result.ratio:6.2f}x baseline"
+            if result.ratio > args.threshold:
+                line += "   REGRESSION"
+        print(line)
+
+    if args.save:
+        baseline.update((r.name, round(r.seconds, 6)) for r in results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+    return int(any(r.ratio and r.ratio > args.threshold for r in results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
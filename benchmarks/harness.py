@@ -0,0 +1,52 @@
+"""Set up the handler's objects from synthetic data, the way MkDocs would, but without the Crystal compiler."""
+
+from __future__ import annotations
+
+import atexit
+import io
+import os
+import tempfile
+from typing import TYPE_CHECKING
+
+import markdown
+from mkdocs_autorefs import AutorefsExtension
+
+from mkdocstrings_handlers.crystal import CrystalHandler, inventory
+from mkdocstrings_handlers.crystal.collector import DocRoot
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+MDX = ["toc", "pymdownx.highlight", "pymdownx.superfences"]
+
+
+def make_root(json_data: bytes, decoder: str | None = None) -> DocRoot:
+    root = inventory.read(io.BytesIO(json_data), decoder)
+    root.__class__ = DocRoot
+    assert isinstance(root, DocRoot)
+    root.source_locations = []
+    return root
+
+
+def temp_file(suffix: str, content: bytes = b"") -> str:
+    """Create a file that gets deleted when the process exits."""
+    fd, path = tempfile.mkstemp(prefix="mkdocstrings-crystal-", suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    atexit.register(os.remove, path)
+    return path
+
+
+def write_json(json_data: bytes) -> str:
+    return temp_file(".json", json_data)
+
+
+def make_handler(json_data: bytes | None, mdx: Sequence = MDX, **config) -> CrystalHandler:
+    if json_data is not None:
+        config["crystal_docs_file"] = write_json(json_data)
+    handler = CrystalHandler(theme="material", **config)
+    handler._update_env(
+        markdown.Markdown(), {"mdx": [*mdx, AutorefsExtension()], "mdx_configs": {}}
+    )
+    return handler
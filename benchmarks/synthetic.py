@@ -0,0 +1,193 @@
+"""Generate synthetic `crystal docs --format=json` output, without needing the Crystal compiler."""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import random
+from typing import Any
+
+_WORDS = (  # noqa: SIM905
+    "the of to and a in is it you that he was for on are with as his they be at one have this "
+    "from or had by hot word but what some we can out other were all there when up use your how "
+    "said an each she which do their time if will way about many then them write would like so"
+).split()
+
+_BUILTIN_TYPES = ["Int32", "String", "Bool", "Nil", "Float64"]
+
+
+@dataclasses.dataclass
+class Scale:
+    """Parameters of the generated doc tree."""
+
+    types: int = 200
+    """Total number of (nested) types, not counting the few built-in ones."""
+    depth: int = 3
+    """Maximum nesting depth of types."""
+    methods: int = 10
+    """Number of distinct methods per type."""
+    overloads: int = 2
+    """Number of overloads of each method."""
+    constants: int = 3
+    """Number of constants (or enum members) per type."""
+    doc_size: int = 3
+    """Number of paragraphs in each doc comment."""
+    seed: int = 0
+
+
+SCALES = {
+    "small": Scale(types=20, depth=2, methods=4, overloads=2, constants=2, doc_size=1),
+    "default": Scale(),
+    "stdlib": Scale(types=1000, depth=4, methods=25, overloads=2, constants=4, doc_size=3),
+}
+
+
+def generate(scale: Scale) -> dict[str, Any]:
+    """Produce the parsed JSON structure of a whole `crystal docs` run."""
+    return _Generator(scale).generate()
+
+
+def generate_json(scale: Scale) -> bytes:
+    """Produce the raw JSON output of a whole `crystal docs` run."""
+    return json.dumps(generate(scale)).encode()
+
+
+class _Generator:
+    def __init__(self, scale: Scale):
+        self.scale = scale
+        self.rand = random.Random(scale.seed)
+        self.type_names: list[str] = list(_BUILTIN_TYPES)
+
+    def generate(self) -> dict[str, Any]:
+        program = self._type(["Top Level Namespace"], "module", path="toplevel.html")
+        program["full_name"] = "Top Level Namespace"
+
+        # Lay out the type tree first, so that methods can link to any type.
+        tree: list[tuple[list[str], str, list]] = []
+        children: dict[int, list] = {}
+        parents: list[tuple[list[str], int]] = [([], -1)]
+        for i in range(self.scale.types):
+            parent_names, parent_i = self.rand.choice(parents)
+            names = [*parent_names, f"Type{i}"]
+            kind = self.rand.choice(["class", "module", "struct", "enum", "alias", "class"])
+            tree.append((names, kind, children.setdefault(parent_i, [])))
+            if len(names) < self.scale.depth and kind != "alias":
+                parents.append((names, i))
+            self.type_names.append("::".join(names))
+
+        for i, (names, kind, siblings) in enumerate(tree):
+            typ = self._type(names, kind)
+            typ["types"] = children.setdefault(i, [])
+            siblings.append(typ)
+        program["types"] = [self._type([name], "struct") for name in _BUILTIN_TYPES]
+        program["types"] += children.get(-1, [])
+
+        return {"repository_name": "synthetic", "body": "", "program": program}
+
+    def _type(self, names: list[str], kind: str, path: str | None = None) -> dict[str, Any]:
+        full_name = "::".join(names)
+        path = path or "/".join(names) + ".html"
+        depth = path.count("/")
+        doc = self._doc()
+        data: dict[str, Any] = {
+            "html_id": f"synthetic/{full_name}",
+            "path": path,
+            "kind": kind,
+            "full_name": full_name,
+            "name": names[-1],
+            "abstract": kind == "class" and self.rand.random() < 0.2,
+            "ancestors": [],
+            "locations": [
+                {"filename": self._filename(names), "line_number": 1, "url": None},
+            ],
+            "repository_name": "synthetic",
+            "program": False,
+            "enum": kind == "enum",
+            "alias": kind == "alias",
+            "const": False,
+            "doc": doc,
+            "summary": f"<p>{doc.split(chr(10), 1)[0]}</p>",
+        }
+        if kind in ("class", "struct"):
+            data["superclass"] = {
+                "html_id": "synthetic/Reference",
+                "kind": "class",
+                "full_name": "Reference",
+                "name": "Reference",
+            }
+        if kind == "alias":
+            # Only alias the built-in types, to avoid cycles.
+            target = self.rand.choice(_BUILTIN_TYPES)
+            data["aliased"] = target
+            data["aliased_html"] = self._link(target, depth)
+            return data
+        filename = data["locations"][0]["filename"]
+        line = 2
+        constants = []
+        for i in range(self.scale.constants):
+            name = f"Member{i}" if kind == "enum" else f"CONSTANT_{i}"
+            constants.append({"id": name, "name": name, "value": str(i), "doc": self._doc()})
+        data["constants"] = constants
+        methods = []
+        for i in range(self.scale.methods):
+            for j in range(self.scale.overloads):
+                methods.append(self._method(f"method_{i}", j, depth, filename, line))
+                line += 5
+        data["instance_methods"] = methods
+        data["class_methods"] = [self._method("create", 0, depth, filename, line)]
+        data["constructors"] = [
+            self._method("new", j, depth, filename, line + 5 * (j + 1))
+            for j in range(self.scale.overloads)
+        ]
+        return data
+
+    def _method(self, name: str, n_args: int, depth: int, filename: str, line: int):
+        args = [
+            {
+                "name": f"arg{k}",
+                "external_name": f"arg{k}",
+                "restriction": self.rand.choice(self.type_names),
+            }
+            for k in range(n_args)
+        ]
+        ret = self.rand.choice(self.type_names)
+        args_string = ", ".join(f"{a['name']} : {a['restriction']}" for a in args)
+        args_html = ", ".join(f"{a['name']} : {self._link(a['restriction'], depth)}" for a in args)
+        if args:
+            args_string, args_html = f"({args_string})", f"({args_html})"
+        html_id = name + ("(" + ",".join(a["name"] for a in args) + ")" if args else "")
+        return {
+            "html_id": html_id + "-instance-method",
+            "name": name,
+            "doc": self._doc(),
+            "abstract": False,
+            "args": args,
+            "args_string": f"{args_string} : {ret}",
+            "args_html": f"{args_html} : {self._link(ret, depth)}",
+            "location": {"filename": filename, "line_number": line, "url": None},
+            "def": {
+                "name": name,
+                "args": args,
+                "return_type": ret,
+                "visibility": "Public",
+                "body": "",
+            },
+        }
+
+    def _link(self, type_name: str, depth: int) -> str:
+        href = "../" * depth + type_name.replace("::", "/") + ".html"
+        return f'<a href="{href}">{type_name}</a>'
+
+    def _filename(self, names: list[str]) -> str:
+        return "src/" + "/".join(name.lower() for name in names) + ".cr"
+
+    def _doc(self) -> str:
+        paragraphs = []
+        for _ in range(self.scale.doc_size):
+            words = self.rand.choices(_WORDS, k=30)
+            words[self.rand.randrange(30)] = f"`{self.rand.choice(self.type_names)}`"
+            text = " ".join(words)
+            paragraphs.append(text[0].upper() + text[1:] + ".")
+        if self.scale.doc_size > 1:
+            paragraphs.append("```\nx = 1 + 2\nputs x\n```")
+        return "\n\n".join(paragraphs)
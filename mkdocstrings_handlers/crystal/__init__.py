@@ -21,11 +21,39 @@ class CrystalHandler(CrystalCollector, CrystalRenderer, BaseHandler):
         custom_templates: str | None = None,
         crystal_docs_flags: Sequence[str] = (),
         source_locations: Mapping[str, str] = {},
+        crystal_docs_file: str | None = None,
+        crystal_info: Mapping[str, str] = {},
+        projects: Sequence[Mapping[str, Any]] = (),
+        jobs: int | None = None,
+        cache_dir: str | None = None,
+        versions: Mapping[str, Mapping[str, Any]] = {},
+        prune: Mapping[str, Sequence[str]] | None = None,
+        *,
+        prefetch: bool = False,
+        incremental: bool = False,
+        search_index: bool = False,
         **config: Any,
     ) -> None:
         BaseHandler.__init__(self, "crystal", theme, custom_templates)
         CrystalCollector.__init__(
-            self, crystal_docs_flags=crystal_docs_flags, source_locations=source_locations
+            self,
+            crystal_docs_flags=crystal_docs_flags,
+            source_locations=source_locations,
+            crystal_docs_file=crystal_docs_file,
+            crystal_info=crystal_info,
+            projects=projects,
+            jobs=jobs,
+            cache_dir=cache_dir,
+            versions=versions,
+            prune=prune,
+            prefetch=prefetch,
+        )
+        # mkdocstrings passes the config of the whole site along with the handler's own options.
+        CrystalRenderer.__init__(
+            self,
+            incremental=incremental,
+            search_index=search_index,
+            mkdocs_config=config.get("mkdocs"),
         )
 
 
@@ -0,0 +1,159 @@
+"""Work with the doc tree of a project outside of a MkDocs build, using the handler options from its `mkdocs.yml`.
+
+python -m mkdocstrings_handlers.crystal [-f mkdocs.yml] {warm,dump,stats}
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import contextlib
+import json
+import posixpath
+import sys
+import time
+from collections.abc import Generator, Mapping, Sequence
+from typing import TYPE_CHECKING, Any
+
+from . import CrystalHandler, inventory, snapshot
+
+if TYPE_CHECKING:
+    from mkdocs.config.defaults import MkDocsConfig
+
+    from .items import DocItem
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m mkdocstrings_handlers.crystal", description=__doc__
+    )
+    parser.add_argument(
+        "-f",
+        "--config-file",
+        default="mkdocs.yml",
+        help="the MkDocs config to take the options from",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm = subparsers.add_parser(
+        "warm",
+        help="build the doc tree and compile the templates into `cache_dir`, so that the next MkDocs build starts from them",
+    )
+    warm.add_argument(
+        "--json",
+        metavar="FILE",
+        help="also write the output of `crystal doc` to this file, for use as `crystal_docs_file`",
+    )
+
+    dump = subparsers.add_parser(
+        "dump", help="print the inventory: the identifier and the URL of every item"
+    )
+    dump.add_argument("--version", help="the name of one of the `versions` (default: the main one)")
+    dump.add_argument(
+        "--base-url", default="", help="the URL of the API docs, to prepend to each path"
+    )
+
+    subparsers.add_parser(
+        "stats", help="print the number of items, and timings of loading and lookups"
+    )
+
+    args = parser.parse_args(argv)
+    config, handler = _make_handler(args.config_file)
+    try:
+        if args.command == "warm":
+            _warm(handler, config, args.json)
+        elif args.command == "dump":
+            _dump(handler, args.version, args.base_url)
+        elif args.command == "stats":
+            _stats(handler)
+    finally:
+        handler.teardown()
+    return 0
+
+
+def _make_handler(config_file: str) -> tuple[MkDocsConfig, CrystalHandler]:
+    from mkdocs.config import load_config
+
+    config = load_config(config_file)
+    plugin_config: Any = config.plugins["mkdocstrings"].config  # type: ignore[attr-defined]
+    options: Mapping[str, Any] = plugin_config.handlers.get("crystal", {})
+    handler = CrystalHandler(
+        theme=config.theme.name or "material",
+        custom_templates=plugin_config.custom_templates,
+        **options,
+    )
+    return config, handler
+
+
+def _warm(handler: CrystalHandler, config: MkDocsConfig, json_file: str | None) -> None:
+    with _timed("Built the doc tree"):
+        for root in list(handler.roots.values()) or [handler.root]:
+            snapshot.materialize(root)
+    if handler._cache_dir is None:
+        print("No `cache_dir` is configured, so nothing is saved", file=sys.stderr)
+    else:
+        import markdown
+
+        # Set up the same as for a page, so that the templates get compiled the same way.
+        handler._update_env(
+            markdown.Markdown(),
+            {"mdx": config.markdown_extensions, "mdx_configs": config.mdx_configs},
+        )
+        with _timed("Compiled the templates"):
+            for name in handler.env.list_templates():
+                handler.env.get_template(name)
+    if json_file is not None:
+        if len(handler._results) != 1:
+            raise SystemExit("--json can only be used with a single project")
+        data = inventory.loads(handler._results[0].result())
+        # So that a later job without the compiler can substitute the same values into the options.
+        data["crystal_info"] = {**data.get("crystal_info", {}), **handler._crystal_info.resolved()}
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+
+def _dump(handler: CrystalHandler, version: str | None, base_url: str) -> None:
+    if version is None:
+        root = handler.root
+    elif (root := handler.roots.get(version)) is None:
+        raise SystemExit(f"Unknown version {version!r}")
+    # The same as what another site gets when it loads these docs as an inventory.
+    for abs_id, path in inventory.list_objects(root):
+        print(f"{abs_id}\t{posixpath.join(base_url, path)}")
+
+
+def _stats(handler: CrystalHandler) -> None:
+    with _timed("Loaded the doc tree"):
+        root = handler.root
+    source = "from the snapshot" if handler._cache_dir and not handler._pending_snapshot else "anew"
+    print(f"  ({source})")
+
+    items: list[DocItem] = [item for item in root.walk_items() if item.parent is not None]
+    counts = collections.Counter(item.kind for item in items)
+    for kind, count in sorted(counts.items()):
+        print(f"{kind:<20} {count:8}")
+    print(f"{'total':<20} {len(items):8}")
+
+    with _timed("Materialized all items"):
+        snapshot.materialize(root)
+
+    identifiers = [item.abs_id for item in items]
+    start = time.perf_counter()
+    for identifier in identifiers:
+        root.lookup(identifier)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Looked up {len(identifiers)} identifiers in {elapsed:.3f} s"
+        f" ({elapsed / max(len(identifiers), 1) * 1e6:.1f} us each)"
+    )
+
+
+@contextlib.contextmanager
+def _timed(message: str) -> Generator[None]:
+    start = time.perf_counter()
+    yield
+    print(f"{message} in {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
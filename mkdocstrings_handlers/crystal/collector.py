@@ -1,22 +1,38 @@
 from __future__ import annotations
 
+import bisect
 import collections
-import collections.abc
+import contextlib
 import dataclasses
 import functools
+import hashlib
+import importlib
+import itertools
+import json
 import logging
+import operator
 import os
 import re
-import shlex
-import subprocess
-from collections.abc import Iterable, Iterator, Mapping, Sequence
+import string
+from collections.abc import Iterator, Mapping, Sequence
 from functools import cached_property
-from typing import TYPE_CHECKING, Any, Callable, TypeVar, cast
+from typing import IO, TYPE_CHECKING, Any, Callable, TypeVar
 
 from mkdocstrings.handlers.base import BaseHandler, CollectionError
 
-from . import inventory
-from .items import DocConstant, DocItem, DocLocation, DocMapping, DocMethod, DocModule, DocType
+from . import crystal_html, inventory
+from .items import (
+    _SUB_ITEMS,
+    DocConstant,
+    DocItem,
+    DocLocation,
+    DocMapping,
+    DocMethod,
+    DocModule,
+    DocType,
+    _canonical_json,
+    _hash,
+)
 
 try:
     from mkdocs.exceptions import PluginError
@@ -26,110 +42,571 @@ except ImportError:
 log = logging.getLogger(f"mkdocs.plugins.{__name__}")
 
 if TYPE_CHECKING:
+    import concurrent.futures
+
+    from .sources import SourceCache
+
     _D = TypeVar("_D", bound=DocItem)
 
 
 class CrystalCollector(BaseHandler):
     def __init__(
-        self, crystal_docs_flags: Sequence[str] = (), source_locations: Mapping[str, str] = {}
+        self,
+        crystal_docs_flags: Sequence[str] = (),
+        source_locations: Mapping[str, str] = {},
+        crystal_docs_file: str | None = None,
+        crystal_info: Mapping[str, str] = {},
+        projects: Sequence[Mapping[str, Any]] = (),
+        jobs: int | None = None,
+        cache_dir: str | None = None,
+        versions: Mapping[str, Mapping[str, Any]] = {},
+        prune: Mapping[str, Sequence[str]] | None = None,
+        *,
+        prefetch: bool = False,
     ):
-        """Create a "collector", reading docs from `crystal doc` in the current directory.
+        """Create a "collector", reading docs from `crystal doc` in the current directory (or from `crystal_docs_file`, if given).
 
         Normally this should not be instantiated.
 
         When using mkdocstrings-crystal within MkDocs, a plugin can access the instance as `config.plugins['mkdocstrings'].get_handler('crystal')`.
 
         See [Extras](extras.md).
+
+        `crystal docs` is launched only when the docs are first needed (by `root`, `roots` or `collect`), unless `prefetch` is set, in which case it starts running in the background right away.
         """
-        command = [
-            "crystal",
-            "docs",
-            "--format=json",
-            "--project-name=",
-            "--project-version=",
-        ]
-        if source_locations:
-            command.append("--source-refname=master")
-        command += (s.format_map(_crystal_info) for s in crystal_docs_flags)
-        log.debug("Running `%s`", " ".join(shlex.quote(arg) for arg in command))
+        self._crystal_info = _CrystalInfo(crystal_info)
+        self._cache_dir = cache_dir
+        self._pending_snapshot: tuple[str, str] | None = None
+
+        version_specs = dict(versions)
+        self._default_version = next(iter(version_specs), None)
+        if version_specs:
+            if projects or crystal_docs_flags or source_locations or crystal_docs_file:
+                raise PluginError(
+                    "The options `projects`, `crystal_docs_flags`, `source_locations`, "
+                    "`crystal_docs_file` should be specified per-version when `versions` is used"
+                )
+            # The first version is the main one.
+            projects = [version_specs.pop(next(iter(version_specs)))]
+
+        if not projects:
+            projects = [
+                dict(
+                    crystal_docs_flags=crystal_docs_flags,
+                    source_locations=source_locations,
+                    crystal_docs_file=crystal_docs_file,
+                )
+            ]
+        elif crystal_docs_flags or source_locations or crystal_docs_file:
+            raise PluginError(
+                "The options `crystal_docs_flags`, `source_locations`, `crystal_docs_file` "
+                "should be specified per-project when `projects` is used"
+            )
+        try:
+            self._projects = [_Project(**p, crystal_info=self._crystal_info) for p in projects]
+            self._versions = {
+                name: _Project(**p, crystal_info=self._crystal_info)
+                for name, p in version_specs.items()
+            }
+        except TypeError as e:
+            raise PluginError(f"Invalid entry in `projects` or `versions`: {e}")
+        try:
+            self._pruning = _Pruning(**prune) if prune is not None else None
+        except TypeError as e:
+            raise PluginError(f"Invalid `prune` option: {e}")
 
-        self._proc = subprocess.Popen(command, stdout=subprocess.PIPE)
+        self._jobs = jobs
+        if prefetch:
+            self._start()
 
         # For unambiguous prefix match: add trailing slash, sort by longest path first.
         self._source_locations = sorted(
-            (
-                _SourceDestination(os.path.relpath(k) + os.sep, source_locations[k])
-                for k in source_locations
-            ),
+            itertools.chain.from_iterable(p.source_locations for p in self._projects),
             key=lambda d: -d.src_path.count("/"),
         )
+        from . import __version__
+
+        self._snapshot_inputs = [
+            __version__,
+            dict(crystal_info),
+            [(d.src_path, d.dest_url) for d in self._source_locations],
+            dataclasses.asdict(self._pruning) if self._pruning else None,
+        ]
+
+    def _source_url_inputs(self) -> list[dict[str, str | None]]:
+        """The current values of everything that the source URLs of items get derived from, other than the options."""
+        projects = [*self._projects, *self._versions.values()]
+        return [d.referenced_values() for p in projects for d in p.source_locations]
+
+    def _start(self) -> None:
+        """Launch reading the docs of all projects and versions in the background, if not done yet."""
+        if "_results" in vars(self):
+            return
+        import concurrent.futures
+
+        # Each job runs one `crystal docs` process from start to end, so this bounds their number.
+        executor = concurrent.futures.ThreadPoolExecutor(
+            self._jobs, thread_name_prefix="crystal-docs"
+        )
+        self._results: list[concurrent.futures.Future[bytes]] = [
+            executor.submit(project.read) for project in self._projects
+        ]
+        self._version_results: dict[str, concurrent.futures.Future[bytes]] = {
+            name: executor.submit(project.read) for name, project in self._versions.items()
+        }
+        executor.shutdown(wait=False)
 
     @cached_property
     def root(self) -> DocRoot:
         """The top-level namespace, represented as a fake module."""
-        try:
-            with self._proc:
-                stdout = self._proc.stdout
-                assert stdout is not None
-                module = inventory.read(stdout)
+        self._start()
+        raws = [result.result() for result in self._results]
+
+        if self._cache_dir is not None:
+            from . import snapshot
+
+            path = os.path.join(self._cache_dir, snapshot.FILENAME)
+            key = self._snapshot_key(raws)
+            saved = snapshot.load(path, key)
+            if saved is not None:
+                module, crystal_info, url_inputs = saved
+                self._crystal_info.record(crystal_info, override=False)
+                # The source URLs are stored along with the items, so the values in them (such as the version of the shard or of Crystal) have to be the same too.
+                if url_inputs == self._source_url_inputs():
+                    module.source_locations = self._source_locations
+                    return module
+                log.debug("The snapshot %r has outdated source URLs", path)
+            self._pending_snapshot = (path, key)
+
+        data, *others = (project.parse(raw) for project, raw in zip(self._projects, raws))
+        for other in others:
+            _merge_type(data["program"], other["program"])
+        if self._pruning is not None:
+            self._pruning.apply(data["program"])
+
+        for d in [data, *others]:
+            # Values from the config take precedence over the ones recorded in the file.
+            self._crystal_info.record(d.get("crystal_info", {}), override=False)
+
+        module = inventory.from_data(data)
+        module.__class__ = DocRoot
+        assert isinstance(module, DocRoot)
+        module.source_locations = self._source_locations
+        return module
+
+    @cached_property
+    def roots(self) -> Mapping[str, DocRoot]:
+        """The top-level namespaces of all `versions`, by name (the first one is the same as `root`).
+
+        Items that are identical between versions share their raw data.
+        """
+        if self._default_version is None:
+            return {}
+        self._start()
+        result = {self._default_version: self.root}
+        seen: dict[str, Mapping[str, Any]] = {}
+        _share_data(self.root.data, seen, replace=False)
+        for name, project in self._versions.items():
+            data = project.parse(self._version_results[name].result())
+            if self._pruning is not None:
+                self._pruning.apply(data["program"])
+            _share_data(data["program"], seen, replace=True)
+            module = inventory.from_data(data)
             module.__class__ = DocRoot
             assert isinstance(module, DocRoot)
-            module.source_locations = self._source_locations
-            return module
-        finally:
-            if self._proc.returncode:
-                args = cast("Sequence[str]", self._proc.args)
-                cmd = " ".join(shlex.quote(arg) for arg in args)
-                raise PluginError(f"Command `{cmd}` exited with status {self._proc.returncode}")
+            module.source_locations = sorted(
+                project.source_locations, key=lambda d: -d.src_path.count("/")
+            )
+            result[name] = module
+        return result
 
     def collect(self, identifier: str, config: Mapping[str, Any]) -> DocView:
         """[Find][mkdocstrings_handlers.crystal.items.DocItem.lookup] an item by its identifier.
 
+        The option `version` selects one of the `versions` to look in, otherwise it's the main `root`.
+
         Raises:
             CollectionError: When an item by that identifier couldn't be found.
         """
+        item: DocItem = self.root
+        if (version := config.get("version")) is not None:
+            try:
+                item = self.roots[version]
+            except KeyError:
+                raise CollectionError(f"Unknown version {version!r}") from None
+        if identifier != "::":
+            try:
+                item = item.lookup(identifier)
+            except CollectionError as e:
+                if isinstance(item, DocType) and (similar := item.suggest(identifier, 3)):
+                    raise CollectionError(
+                        f"{e} - did you mean {' or '.join(map(repr, similar))}?"
+                    ) from None
+                raise
+        return self.view(item, config)
+
+    def view(self, item: DocItem, config: Mapping[str, Any] = {}) -> DocView:  # noqa: PLR6301
+        """Prepare an already found item for rendering, same as [`collect`][mkdocstrings_handlers.crystal.collector.CrystalCollector.collect] does."""
         config = {
             "nested_types": False,
             "file_filters": True,
             **config,
         }
-
-        item: DocItem = self.root
-        if identifier != "::":
-            item = item.lookup(identifier)
         return DocView(item, config)
 
+    def teardown(self) -> None:
+        """Write the snapshot of the doc tree into `cache_dir`, if it was built anew during this run.
+
+        Then, once everything has been written out, drop the values that were computed for rendering (see [`memory.release_caches`][mkdocstrings_handlers.crystal.memory.release_caches]), as the tree may outlive the build, and close the source files that [`item_at`][mkdocstrings_handlers.crystal.collector.DocRoot.item_at] opened.
+        """
+        # Going over the same root twice (`roots` includes `root`) is harmless.
+        roots = [vars(self).get("root"), *vars(self).get("roots", {}).values()]
+        for root in roots:
+            if root is not None:
+                root._close_sources()
+
+        if self._pending_snapshot is not None and "root" in vars(self):
+            from . import snapshot
+
+            path, key = self._pending_snapshot
+            self._pending_snapshot = None
+            snapshot.materialize(self.root)
+            snapshot.save(
+                path,
+                key,
+                (self.root, dict(self._crystal_info.recorded), self._source_url_inputs()),
+            )
+        super().teardown()
+
+        from . import memory
+
+        for root in roots:
+            if root is not None:
+                memory.release_caches(root)
+
+    def _snapshot_key(self, raws: Sequence[bytes]) -> str:
+        """Identifies all the inputs that the doc tree is derived from."""
+        from . import snapshot
+
+        inputs = [snapshot.FORMAT, *self._snapshot_inputs]
+        h = hashlib.blake2b(json.dumps(inputs).encode(), digest_size=16)
+        for raw in raws:
+            h.update(len(raw).to_bytes(8, "little"))
+            h.update(raw)
+        return h.hexdigest()
+
+
+class _Project:
+    """One directory to run `crystal docs` in (or to read its output from)."""
+
+    def __init__(
+        self,
+        crystal_info: _CrystalInfo,
+        directory: str = ".",
+        crystal_docs_flags: Sequence[str] = (),
+        source_locations: Mapping[str, str] = {},
+        crystal_docs_file: str | None = None,
+    ):
+        self.directory = os.path.normpath(directory)
+        self.crystal_docs_file = crystal_docs_file and os.path.join(directory, crystal_docs_file)
+        self._crystal_docs_flags = crystal_docs_flags
+        self._crystal_info = crystal_info
+
+        self.source_locations = [
+            _SourceDestination(
+                os.path.relpath(os.path.join(directory, k)) + os.sep, v, crystal_info
+            )
+            for k, v in source_locations.items()
+        ]
+
+    @cached_property
+    def command(self) -> list[str]:
+        """The `crystal docs` command line. Only formatted once it's run, as the flags may need `crystal env`."""
+        command = [
+            "crystal",
+            "docs",
+            "--format=json",
+            "--project-name=",
+            "--project-version=",
+        ]
+        if self.source_locations:
+            command.append("--source-refname=master")
+        command += (s.format_map(_DictAccess(self._crystal_info)) for s in self._crystal_docs_flags)
+        return command
+
+    def read(self) -> bytes:
+        """Get the raw JSON output of `crystal docs`."""
+        if self.crystal_docs_file is not None:
+            log.debug("Reading %r", self.crystal_docs_file)
+            with _open_compressed(self.crystal_docs_file) as f:
+                return f.read()
+        return self._run()
+
+    def parse(self, raw: bytes) -> dict[str, Any]:
+        data = inventory.loads(raw)
+        if self.directory != ".":
+            # Make the paths relative to the current directory, same as for the main project.
+            _rebase_locations(data["program"], self.directory)
+        return data
+
+    def _run(self) -> bytes:
+        import shlex
+        import subprocess
+
+        cmd = " ".join(shlex.quote(arg) for arg in self.command)
+        log.debug("Running `%s` in %r", cmd, self.directory)
+
+        proc = subprocess.Popen(self.command, stdout=subprocess.PIPE, cwd=self.directory)
+        try:
+            with proc:
+                assert proc.stdout is not None
+                return proc.stdout.read()
+        finally:
+            if proc.returncode:
+                raise PluginError(f"Command `{cmd}` exited with status {proc.returncode}")
+
+
+_CHILD_KEYS = {
+    "types": "full_name",
+    "constants": "name",
+    "instance_methods": "html_id",
+    "class_methods": "html_id",
+    "constructors": "html_id",
+    "macros": "html_id",
+    "locations": "filename",
+    "subclasses": "full_name",
+    "including_types": "full_name",
+}
+# The order of the lists in the output of `crystal docs`, to keep after adding to them.
+_CHILD_ORDER = {
+    "types": "full_name",
+    "constants": "name",
+    "instance_methods": "name",
+    "class_methods": "name",
+    "constructors": "name",
+    "macros": "name",
+    "subclasses": "full_name",
+    "including_types": "full_name",
+}
+
+
+def _merge_type(into: dict[str, Any], other: Mapping[str, Any]) -> None:
+    """Merge the type `other` from another project's docs into the same type `into`.
+
+    Sub-items that both have (such as the stdlib) are deduplicated, keeping the first one.
+    """
+    for key, id_key in _CHILD_KEYS.items():
+        if not other.get(key):
+            continue
+        items: list[dict[str, Any]] = into.setdefault(key, [])
+        existing = {item[id_key]: item for item in items}
+        added = False
+        for item in other[key]:
+            if (dup := existing.get(item[id_key])) is None:
+                items.append(item)
+                added = True
+            elif key == "types":
+                _merge_type(dup, item)
+        if added and key in _CHILD_ORDER:
+            items.sort(key=operator.itemgetter(_CHILD_ORDER[key]))
+
+
+@dataclasses.dataclass
+class _Pruning:
+    """Which types to keep in the doc tree (the `prune` option), everything else gets dropped right after loading."""
+
+    namespaces: Sequence[str] = ()
+    """Types to keep along with everything nested in them, e.g. `MyLib` (also keeps `MyLib::Foo`)."""
+    files: Sequence[str] = ()
+    """Filters of the files where types are defined, same as the `file_filters` option."""
+
+    def apply(self, program: dict[str, Any]) -> None:
+        """Prune the raw data of the top-level namespace in place.
+
+        Top-level methods and macros are kept only if they're in the kept files, while top-level constants are always kept.
+
+        The types that are referenced by the kept items (through their superclass, ancestors etc., or their methods' signatures) remain as stubs: just their name and kind, without docs, members or relations. So they can still be looked up, just like the namespaces that the kept types are nested in.
+        """
+        files = tuple(self.files)
+        for key in _METHODS:
+            program[key] = [
+                meth
+                for meth in program.get(key, ())
+                if files
+                and (loc := meth.get("location"))
+                and _apply_filter(files, (loc["filename"],))
+            ]
+        kept: set[str] = set()
+        referenced = _references(program)
+        self._find(program, kept, referenced)
+        program["types"] = [
+            t for t in (self._prune(typ, kept, referenced) for typ in program.get("types", ())) if t
+        ]
+
+    def _find(self, data: Mapping[str, Any], kept: set[str], referenced: set[str]) -> None:
+        for typ in data.get("types", ()):
+            abs_id = typ["full_name"].split("(", 1)[0]
+            if self._keeps(abs_id, typ):
+                kept.add(abs_id)
+                referenced |= _references(typ)
+            self._find(typ, kept, referenced)
+
+    def _keeps(self, abs_id: str, typ: Mapping[str, Any]) -> bool:
+        if any(abs_id == ns or abs_id.startswith(ns + "::") for ns in self.namespaces):
+            return True
+        filenames = tuple(loc["filename"] for loc in typ.get("locations", ()))
+        return bool(self.files) and _apply_filter(tuple(self.files), filenames)
+
+    def _prune(
+        self, typ: dict[str, Any], kept: set[str], referenced: set[str]
+    ) -> dict[str, Any] | None:
+        nested = [t for t in (self._prune(t, kept, referenced) for t in typ.get("types", ())) if t]
+        abs_id = typ["full_name"].split("(", 1)[0]
+        if abs_id in kept:
+            typ["types"] = nested
+            return typ
+        if nested or abs_id in referenced:
+            stub = {k: typ[k] for k in _STUB_KEYS if k in typ}
+            stub.update(locations=[], types=nested)
+            return stub
+        return None
+
+
+def _references(typ: Mapping[str, Any]) -> set[str]:
+    """The identifiers of the types that this type's own data links to."""
+    result: set[str] = set()
+    for key in _RELATIONS:
+        paths = typ.get(key) or ()
+        if isinstance(paths, Mapping):
+            paths = [paths]
+        result.update(path["full_name"].split("(", 1)[0] for path in paths)
+    htmls = [typ.get("aliased_html") or ""]
+    for key in _METHODS:
+        htmls += (meth.get("args_html") or "" for meth in typ.get(key, ()))
+    for html in htmls:
+        result.update(
+            crystal_html._CrystalHTMLHandler.link_to_path(href) for href in _HREF.findall(html)
+        )
+    return result
+
+
+_METHODS = ("constructors", "class_methods", "instance_methods", "macros")
+
+_RELATIONS = (
+    "superclass",
+    "ancestors",
+    "included_modules",
+    "extended_modules",
+    "subclasses",
+    "including_types",
+)
+
+_STUB_KEYS = ("html_id", "path", "kind", "full_name", "name", "abstract", "aliased")
+
+_HREF = re.compile(r'href="([^"]*)"')
+
+
+def _share_data(
+    data: Mapping[str, Any], seen: dict[str, Mapping[str, Any]], *, replace: bool
+) -> str:
+    """Deduplicate the sub-items of `data` against the ones in `seen`, by their content hash.
+
+    Params:
+        replace: Whether to replace sub-items with their equal counterparts from `seen`, or only to add them there.
+    Returns:
+        The content hash of `data` itself.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_canonical_json({k: v for k, v in data.items() if k not in _SUB_ITEMS}).encode())
+    for key in _SUB_ITEMS:
+        subs = data.get(key)
+        if not subs:
+            continue
+        h.update(key.encode())
+        for i, sub in enumerate(subs):
+            if key == "types":
+                sub_hash = _share_data(sub, seen, replace=replace)
+            else:
+                sub_hash = _hash(_canonical_json(sub))
+            shared = seen.setdefault(sub_hash, sub)
+            if replace:
+                subs[i] = shared
+            h.update(sub_hash.encode())
+    return h.hexdigest()
+
+
+def _rebase_locations(data: dict[str, Any], directory: str) -> None:
+    for loc in data.get("locations", ()):
+        loc["filename"] = os.path.normpath(os.path.join(directory, loc["filename"]))
+    for key in ("constructors", "class_methods", "instance_methods", "macros"):
+        for meth in data.get(key, ()):
+            if loc := meth.get("location"):
+                loc["filename"] = os.path.normpath(os.path.join(directory, loc["filename"]))
+    for typ in data.get("types", ()):
+        _rebase_locations(typ, directory)
+
+
+def _open_compressed(path: str) -> IO[bytes]:
+    opener: Callable[..., IO[bytes]] = open
+    for ext, module in ((".gz", "gzip"), (".bz2", "bz2"), (".xz", "lzma")):
+        if path.endswith(ext):
+            # Imported only when needed, as compressed files are rare.
+            opener = importlib.import_module(module).open
+    return opener(path, "rb")
+
 
 @dataclasses.dataclass
 class _SourceDestination:
     src_path: str
     dest_url: str
+    crystal_info: _CrystalInfo
 
     def substitute(self, location: DocLocation) -> str:
         data = {"file": location.filename[len(self.src_path) :], "line": location.line}
         try:
             return self.dest_url.format_map(
-                collections.ChainMap(data, _DictAccess(self), _crystal_info)  # type: ignore[arg-type]
+                collections.ChainMap(data, _DictAccess(self), _DictAccess(self.crystal_info))  # type: ignore[arg-type]
             )
         except KeyError as e:
             raise PluginError(
                 f"The source_locations template {self.dest_url!r} did not resolve correctly: {e}"
             )
 
-    @property
+    @cached_property
     def shard_version(self) -> str:
-        return self._shard_version(os.path.dirname(self.src_path))
-
-    @classmethod
-    @functools.cache
-    def _shard_version(cls, path: str) -> str:
-        file_path = _find_above(path, "shard.yml")
+        # Per instance, so that a rebuild (with a new handler) notices a changed `shard.yml`.
+        file_path = _find_above(os.path.dirname(self.src_path), "shard.yml")
         with open(file_path, "rb") as f:
             m = re.search(rb"^version: *([\S+]+)", f.read(), flags=re.MULTILINE)
         if not m:
             raise PluginError(f"`version:` not found in {file_path!r}")
         return m[1].decode()
 
+    def referenced_values(self) -> dict[str, str | None]:
+        """The values that `dest_url` refers to (other than the location itself), resolved now.
+
+        A value that can't be obtained (e.g. the Crystal compiler isn't available) is `None`, the error is left to come up if it's actually needed.
+        """
+        import subprocess
+
+        names = {
+            re.split(r"[.\[]", field, maxsplit=1)[0]
+            for _, field, _, _ in string.Formatter().parse(self.dest_url)
+            if field
+        }
+        result: dict[str, str | None] = {}
+        for name in sorted(names - {"file", "line"}):
+            result[name] = None
+            for obj in (self, self.crystal_info):
+                try:
+                    result[name] = str(getattr(obj, name))
+                except AttributeError:
+                    continue
+                except (PluginError, OSError, subprocess.SubprocessError):
+                    pass
+                break
+        return result
+
 
 def _find_above(path: str, filename: str) -> str:
     orig_path = path
@@ -142,14 +619,46 @@ def _find_above(path: str, filename: str) -> str:
 
 
 class _CrystalInfo:
+    """Values derived from the Crystal installation, for substitution into the config.
+
+    Recorded values (if any) take precedence, otherwise they're obtained from `crystal env`.
+    """
+
+    def __init__(self, recorded: Mapping[str, str] = {}):
+        self.recorded: dict[str, str] = {}
+        self.record(recorded)
+
+    def record(self, recorded: Mapping[str, str], *, override: bool = True) -> None:
+        for key, value in recorded.items():
+            # A value that was obtained from `crystal env` in the meantime doesn't count.
+            if override or key not in self.recorded:
+                self.recorded[key] = value
+                # Shadows the `cached_property` of the same name.
+                setattr(self, key, value)
+
+    def resolved(self) -> dict[str, str]:
+        """All the values that can be obtained now, whether recorded or from `crystal env`."""
+        import subprocess
+
+        result = {}
+        for name, attr in vars(type(self)).items():
+            if isinstance(attr, cached_property):
+                with contextlib.suppress(PluginError, OSError, subprocess.SubprocessError):
+                    result[name] = getattr(self, name)
+        return result
+
     @cached_property
     def crystal_version(self) -> str:
+        import subprocess
+
         return subprocess.check_output(
             ["crystal", "env", "CRYSTAL_VERSION"], encoding="ascii"
         ).rstrip()
 
     @cached_property
     def crystal_src(self) -> str:
+        import subprocess
+
         out = subprocess.check_output(["crystal", "env", "CRYSTAL_PATH"], text=True).rstrip()
         for path in out.split(os.pathsep):
             if os.path.isfile(os.path.join(path, "prelude.cr")):
@@ -162,18 +671,75 @@ class _DictAccess:
         self.obj = obj
 
     def __getitem__(self, key):
+        import subprocess
+
         try:
             return getattr(self.obj, key)
         except AttributeError as e:
             raise KeyError(f"Missing key: {e}")
-
-
-_crystal_info = _DictAccess(_CrystalInfo())
+        except (OSError, subprocess.SubprocessError) as e:
+            raise PluginError(
+                f"Could not determine {key!r} from the Crystal installation ({e}). "
+                f"If the Crystal compiler isn't available, set it in the `crystal_info` option."
+            )
 
 
 class DocRoot(DocModule):
     source_locations: list[_SourceDestination]
 
+    def items_in_file(self, filename: str) -> Sequence[DocItem]:
+        """All types and methods that have a definition in the file `filename`, in the order of their line numbers.
+
+        A type can be defined across several files, then it's listed for each of them.
+        """
+        return self._file_index.get(filename, ((), ()))[1]
+
+    def item_at(self, filename: str, line: int) -> DocItem | None:
+        """The innermost type or method whose definition (from its first line to its `end`) contains `line` of the file `filename`.
+
+        The ends of definitions are found in the file itself (relative to the current directory), so if it isn't available, this is `None`, same as for a line outside of any definition.
+        """
+        lines, items = self._file_index.get(filename, ((), ()))
+        # Starting from the closest definition before the line, the nested ones come first.
+        for i in reversed(range(bisect.bisect_right(lines, line))):
+            end = self._sources.block_end(filename, lines[i])
+            if end is None:
+                return None
+            if line <= end:
+                return items[i]
+        return None
+
+    @cached_property
+    def _sources(self) -> SourceCache:
+        from .sources import SourceCache
+
+        return SourceCache()
+
+    def _close_sources(self) -> None:
+        """Close the source files that were opened to look up items by line, so that they're read anew next time."""
+        if "_sources" in vars(self):
+            self._sources.close()
+            del self._sources
+
+    @cached_property
+    def _file_index(self) -> dict[str, tuple[Sequence[int], Sequence[DocItem]]]:
+        entries: dict[str, list[tuple[int, int, DocItem]]] = collections.defaultdict(list)
+        for typ in [self, *self.walk_types()]:
+            for loc in typ.locations:
+                entries[loc.filename].append((loc.line, 0, typ))
+            for meth in itertools.chain(
+                typ.constructors, typ.class_methods, typ.instance_methods, typ.macros
+            ):
+                if loc := meth.location:
+                    # On the same line as a type, the method is the more specific one.
+                    entries[loc.filename].append((loc.line, 1, meth))
+
+        index: dict[str, tuple[Sequence[int], Sequence[DocItem]]] = {}
+        for filename, lst in entries.items():
+            lst.sort(key=operator.itemgetter(0, 1))
+            index[filename] = ([e[0] for e in lst], [e[2] for e in lst])
+        return index
+
     def update_url(self, location: DocLocation) -> DocLocation:
         for dest in self.source_locations:
             if (location.filename or "").startswith(dest.src_path):
@@ -207,14 +773,14 @@ class DocView:
             yield from typ.walk_types()
 
     @classmethod
-    def _get_locations(cls, obj: DocItem) -> Sequence[str]:
+    def _get_locations(cls, obj: DocItem) -> tuple[str, ...]:
         if isinstance(obj, DocConstant):
             parent = obj.parent
             if not parent:
                 return ()
             obj = parent
         if isinstance(obj, DocType):
-            return [loc.filename for loc in obj.locations]
+            return tuple(loc.filename for loc in obj.locations)
         elif isinstance(obj, DocMethod):
             if not obj.location:
                 return ()
@@ -227,7 +793,7 @@ class DocView:
         cls,
         filters: Sequence[str] | bool,  # noqa: FBT001
         mapp: DocMapping[_D],
-        getter: Callable[[_D], Sequence[str]],
+        getter: Callable[[_D], tuple[str, ...]],
     ) -> DocMapping[_D]:
         if filters is False:
             return DocMapping(())
@@ -240,12 +806,15 @@ class DocView:
                 f"Expected a non-empty list of strings as filters, not {filters!r}"
             )
 
+        filters = tuple(filters)
         return DocMapping([item for item in mapp if _apply_filter(filters, getter(item))])
 
 
+# Many items share the same files, so each combination needs to be matched only once.
+@functools.lru_cache(maxsize=4096)
 def _apply_filter(
-    filters: Iterable[str],
-    tags: Sequence[str],
+    filters: tuple[str, ...],
+    tags: tuple[str, ...],
 ) -> bool:
     match = False
     for filt in filters:
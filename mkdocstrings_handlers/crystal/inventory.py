@@ -1,16 +1,57 @@
 from __future__ import annotations
 
+import importlib.util
 import itertools
 import json
 import posixpath
 from collections.abc import Iterator
-from typing import IO
+from typing import IO, Any, Callable
 
 from .items import DocModule
 
 
-def read(file: IO) -> DocModule:
-    data = json.load(file)
+def _orjson_loads(raw: bytes) -> Any:
+    import orjson
+
+    return orjson.loads(raw)
+
+
+def _msgspec_loads(raw: bytes) -> Any:
+    import msgspec.json
+
+    return msgspec.json.decode(raw)
+
+
+# Only checked for being installed here, and imported once the docs JSON actually gets decoded.
+DECODERS: dict[str, Callable[[bytes], Any]] = {
+    name: decode
+    for name, decode in [("orjson", _orjson_loads), ("msgspec", _msgspec_loads)]
+    if importlib.util.find_spec(name) is not None
+}
+"""The available JSON decoders, fastest first. The first one is used by default."""
+DECODERS["json"] = json.loads
+
+
+def load(file: IO[bytes], decoder: str | None = None) -> dict[str, Any]:
+    """Parse the JSON output of `crystal docs`."""
+    return loads(file.read(), decoder)
+
+
+def loads(raw: bytes, decoder: str | None = None) -> dict[str, Any]:
+    """Parse the JSON output of `crystal docs`, given as bytes.
+
+    Params:
+        decoder: The name of the decoder to use (one of `DECODERS`), otherwise the fastest available one.
+    """
+    decode = DECODERS[decoder] if decoder else next(iter(DECODERS.values()))
+    return decode(raw)
+
+
+def read(file: IO[bytes], decoder: str | None = None) -> DocModule:
+    return from_data(load(file, decoder))
+
+
+def from_data(data: dict[str, Any]) -> DocModule:
     data["program"]["full_name"] = ""
     return DocModule(data["program"], None, None)
 
@@ -4,7 +4,11 @@ import abc
 import collections
 import contextlib
 import dataclasses
+import hashlib
+import itertools
+import json
 import re
+import sys
 from collections.abc import Iterator, Mapping, Sequence
 from functools import cached_property
 from typing import TYPE_CHECKING, Any, ClassVar, Generic, TypeVar, overload
@@ -17,36 +21,43 @@ if TYPE_CHECKING:
     from typing_extensions import Self
 
     from .collector import DocRoot
+    from .suggestions import TrigramIndex
 
 
 class DocItem(abc.ABC):
     """A representation of a documentable item from Crystal language."""
 
+    # Every item has these, so they get their own slots instead of taking space in `__dict__`.
+    __slots__ = ("__dict__", "abs_id", "rel_id")
+
     _TEMPLATE: str
     parent: DocItem | None = None
     """The item that is the parent namespace for this item."""
     root: DocRoot
+    rel_id: str
+    """The relative identifier of this item, e.g. `Foo` or `baz(x,y)`."""
+    abs_id: str
+    """The absolute identifier of this item, sometimes known as "path", e.g. `Foo::Bar` or `Foo::Bar#baz(x,y)`.
+
+    This is also the canonical identifier that will be used as its HTML id."""
 
     def __init__(self, data: Mapping[str, Any], parent: DocItem | None, root: DocRoot | None):
         self.data = data
         self.parent = parent
         self.root = root or self  # type: ignore[assignment]
+        # The identifiers are read all the time (lookups, anchors, templates), so they're computed just once.
+        self.rel_id = sys.intern(self._make_rel_id())
+        self.abs_id = sys.intern(self._make_abs_id())
 
     @property
     def name(self) -> str:
         """The name of this item, e.g. `Foo` or `baz`."""
         return self.data["name"]
 
-    @property
-    def rel_id(self) -> str:
-        """The relative identifier of this item, e.g. `Foo` or `baz(x,y)`."""
+    def _make_rel_id(self) -> str:
         return self.data["name"]
 
-    @property
-    def abs_id(self) -> str:
-        """The absolute identifier of this item, sometimes known as "path", e.g. `Foo::Bar` or `Foo::Bar#baz(x,y)`.
-
-        This is also the canonical identifier that will be used as its HTML id."""
+    def _make_abs_id(self) -> str:
         return self.data["id"]
 
     @property
@@ -54,10 +65,17 @@ class DocItem(abc.ABC):
         """The doc comment of this item."""
         return self.data.get("doc")
 
+    @cached_property
+    def fingerprint(self) -> str:
+        """A stable hash of the content of this item. For a type, this includes all items within it.
+
+        So, if an item's fingerprint didn't change, nothing about it (or its sub-items) changed."""
+        return _hash(_canonical_json(self.data))
+
     @classmethod
     def _properties(cls):
         for attr in dir(cls):
-            if attr.startswith("_") or attr in ("doc", "abs_id", "name", "kind"):
+            if attr.startswith("_") or attr in ("doc", "abs_id", "name", "kind", "fingerprint"):
                 continue
             if isinstance(getattr(cls, attr), (property, cached_property)):
                 yield attr
@@ -74,7 +92,9 @@ class DocItem(abc.ABC):
 
     def __repr__(self) -> str:
         items = ", ".join(
-            f"{attr}={getattr(self, attr)!r}" for attr in self._properties() if getattr(self, attr)
+            f"{attr}={getattr(self, attr)!r}"
+            for attr in sorted([*self._properties(), "rel_id"])
+            if getattr(self, attr)
         )
         return f"{type(self).__name__}({items})"
 
@@ -149,8 +169,7 @@ class DocType(DocItem):
                 )
         return super().__new__(cls)
 
-    @property
-    def abs_id(self):
+    def _make_abs_id(self) -> str:
         # Drop the possible generic part.
         return self.full_name.split("(", 1)[0]
 
@@ -244,12 +263,89 @@ class DocType(DocItem):
             for loc in self.data["locations"]
         ]
 
+    @property
+    def used_by(self) -> Sequence[DocItem]:
+        """The methods (and aliases) elsewhere that mention this type in their signature, such as taking it as a parameter or returning it."""
+        return self.root._used_by_index.get(self.abs_id, ())
+
+    @cached_property
+    def _used_by_index(self) -> Mapping[str, Sequence[DocItem]]:
+        # Built only on the root, in one pass over every signature in the tree.
+        index: dict[str, dict[DocItem, None]] = collections.defaultdict(dict)
+        for typ in [self, *self.walk_types()]:
+            items: list[tuple[DocItem, Any]] = [
+                (meth, meth.args_string)
+                for meth in itertools.chain(
+                    typ.constructors, typ.class_methods, typ.instance_methods, typ.macros
+                )
+            ]
+            if isinstance(typ, DocAlias):
+                items.append((typ, typ.aliased))
+            for item, text in items:
+                for _, _, path in getattr(text, "tokens", ()):
+                    # The type's own members are already listed on its page.
+                    if path != typ.abs_id:
+                        index[path][item] = None
+        return {path: list(items) for path, items in index.items()}
+
+    def suggest(self, identifier: str, limit: int = 5) -> Sequence[str]:
+        """The identifiers of items in the whole tree that are the most similar to `identifier`, to help with a typo in a failed lookup."""
+        return self.root._suggestion_index.nearest(identifier, limit)
+
+    @cached_property
+    def _suggestion_index(self) -> TrigramIndex:
+        # Built only on the root, and only once some lookup has failed.
+        from .suggestions import TrigramIndex
+
+        names: list[tuple[str, str]] = []
+        for typ in [self, *self.walk_types()]:
+            # The root itself can't be looked up, but its top-level defs, macros and constants can.
+            if typ.parent:
+                names += ((typ.abs_id, typ.abs_id), (typ.rel_id, typ.abs_id))
+            for item in itertools.chain(
+                typ.constants, typ.constructors, typ.class_methods, typ.instance_methods, typ.macros
+            ):
+                names += ((item.abs_id, item.abs_id), (item.rel_id, item.abs_id))
+        return TrigramIndex(names)
+
     def walk_types(self) -> Iterator[DocType]:
         """Recusively iterate over all types under this type (excl. itself) in lexicographic order."""
         for typ in self.types:
             yield typ
             yield from typ.walk_types()
 
+    def walk_items(self) -> Iterator[DocItem]:
+        """Recursively iterate over this type and all items under it, each type followed by its constants and methods."""
+        yield self
+        yield from self.constants
+        yield from self.constructors
+        yield from self.class_methods
+        yield from self.instance_methods
+        yield from self.macros
+        for typ in self.types:
+            yield from typ.walk_items()
+
+    @cached_property
+    def fingerprint(self) -> str:
+        # Only the type's own fields are hashed directly, the rest is built from sub-items' fingerprints.
+        own_data = {k: v for k, v in self.data.items() if k not in _SUB_ITEMS}
+        parts = [_canonical_json(own_data)]
+        for attr in _SUB_ITEMS:
+            parts.append(attr)
+            parts += (item.fingerprint for item in getattr(self, attr))
+        return _hash("\n".join(parts))
+
+
+_SUB_ITEMS = ("constants", "constructors", "class_methods", "instance_methods", "macros", "types")
+
+
+def _canonical_json(data: Mapping[str, Any]) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
 
 class DocModule(DocType):
     """A [DocType][mkdocstrings_handlers.crystal.items.DocType] representing a Crystal module."""
@@ -294,8 +390,7 @@ class DocConstant(DocItem):
 
     _TEMPLATE = "constant.html"
 
-    @property
-    def abs_id(self) -> str:
+    def _make_abs_id(self) -> str:
         return (
             self.parent.abs_id + "::" if self.parent and self.parent.parent else ""
         ) + self.rel_id
@@ -317,8 +412,7 @@ class DocMethod(DocItem):
     METHOD_SEP: str = ""
     METHOD_ID_SEP: str
 
-    @property
-    def rel_id(self):
+    def _make_rel_id(self) -> str:
         d = self.data["def"]
 
         args = [arg.get("external_name", arg["name"]) for arg in d.get("args", ())]
@@ -331,16 +425,17 @@ class DocMethod(DocItem):
 
         return self.name + ("(" + ",".join(args) + ")" if args else "")
 
-    @property
-    def abs_id(self):
+    def _make_abs_id(self) -> str:
         return (
             self.parent.abs_id + self.METHOD_ID_SEP if self.parent and self.parent.parent else ""
         ) + self.rel_id
 
-    @property
-    def short_name(self):
+    @cached_property
+    def short_name(self) -> str:
         """Similar to [rel_id][mkdocstrings_handlers.crystal.items.DocItem.rel_id], but also includes the separator first, e.g. `#bar(x,y)` or `.baz()`"""
-        return (self.METHOD_SEP if self.parent and self.parent.parent else "") + self.name
+        return sys.intern(
+            (self.METHOD_SEP if self.parent and self.parent.parent else "") + self.name
+        )
 
     @property
     def is_abstract(self) -> bool:
@@ -440,6 +535,10 @@ class DocMapping(Generic[_D]):
             search.setdefault(item.rel_id, item)
             search.setdefault(item.name, item)
 
+    def __getnewargs__(self) -> tuple[Sequence[_D]]:
+        # For pickling: `__new__` needs the items, then the rest of the state is restored as is.
+        return (self.items,)
+
     def __iter__(self) -> Iterator[_D]:
         """Iterate over the items like a list."""
         return iter(self.items)
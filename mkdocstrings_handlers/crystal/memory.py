@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import sys
+from collections.abc import Iterator, Mapping
+from functools import cached_property
+from typing import Any
+
+from .items import DocItem, DocMapping, DocType
+
+_MAPPING_ATTRS = (
+    "constants",
+    "instance_methods",
+    "class_methods",
+    "constructors",
+    "macros",
+    "types",
+)
+
+
+@dataclasses.dataclass
+class MemoryReport:
+    """The memory retained by a doc tree, in bytes."""
+
+    items: int
+    """The number of items (types, methods, constants) that are currently materialized."""
+    by_kind: dict[str, int] = dataclasses.field(default_factory=collections.Counter)
+    """The size broken down by [kind][mkdocstrings_handlers.crystal.items.DocItem.kind] of the item that holds it."""
+    by_structure: dict[str, int] = dataclasses.field(default_factory=collections.Counter)
+    """The size broken down by what it's used for: `raw data`, `items`, `search indexes`, `cached derived values`, plus any extra caches that were passed in."""
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_structure.values())
+
+    @property
+    def bytes_per_item(self) -> float:
+        return self.total / max(self.items, 1)
+
+    def __str__(self) -> str:
+        lines = [f"{self.total:>12,} bytes in {self.items:,} items"]
+        for title, sizes in (("By kind:", self.by_kind), ("By structure:", self.by_structure)):
+            lines.append(title)
+            lines += (
+                f"{size:>12,}  {name}"
+                for name, size in sorted(sizes.items(), key=lambda kv: -kv[1])
+            )
+        return "\n".join(lines)
+
+
+def measure(root: DocItem, extra: Mapping[str, Any] = {}) -> MemoryReport:
+    """Measure the memory retained by the doc tree under `root`.
+
+    Only the parts of the tree that were already materialized are counted (nothing gets loaded).
+
+    Params:
+        root: The item whose subtree to measure, usually a `DocRoot`.
+        extra: Other caches that are attributed to the tree, by name (such as rendered HTML).
+    """
+    report = MemoryReport(0)
+    seen: set[int] = set()
+    # Children go first, so that the raw data of every item isn't all claimed by the root.
+    for item in _walk_materialized(root):
+        report.items += 1
+        sizes = report.by_structure
+        before = dict(sizes)
+
+        sizes["raw data"] += _deep_size(item.data, seen)
+        sizes["items"] += _shallow_size(item, seen) + _shallow_size(vars(item), seen)
+        for attr, value in vars(item).items():
+            if isinstance(value, DocMapping):
+                sizes["search indexes"] += _mapping_size(value, seen)
+            elif isinstance(getattr(type(item), attr, None), cached_property):
+                sizes["cached derived values"] += _deep_size(value, seen)
+
+        report.by_kind[item.kind] += sum(sizes[k] - before.get(k, 0) for k in sizes)
+
+    for name, value in extra.items():
+        report.by_structure[name] += _deep_size(value, seen)
+    return report
+
+
+def release_caches(root: DocItem) -> None:
+    """Drop the lazily computed values of all items under `root`, including the items themselves.
+
+    Everything will still work afterwards, just anything that's needed will be computed anew.
+    Keep in mind that this also means new item objects being created.
+    """
+    for item in _walk_materialized(root):
+        cls = type(item)
+        for attr in [a for a in vars(item) if isinstance(getattr(cls, a, None), cached_property)]:
+            delattr(item, attr)
+
+
+def _walk_materialized(item: DocItem) -> Iterator[DocItem]:
+    """Post-order traversal, but only through sub-items that are already cached."""
+    if isinstance(item, DocType):
+        for attr in _MAPPING_ATTRS:
+            for sub in vars(item).get(attr, ()):
+                yield from _walk_materialized(sub)
+    yield item
+
+
+def _mapping_size(mapp: DocMapping, seen: set[int]) -> int:
+    if id(mapp) in seen:
+        return 0
+    size = _shallow_size(mapp, seen) + _shallow_size(vars(mapp), seen)
+    for value in (mapp.items, mapp.search):
+        # Only the containers -- the items in them are accounted for separately.
+        size += _shallow_size(value, seen)
+        if isinstance(value, Mapping):
+            size += sum(_deep_size(k, seen) for k in value)
+    return size
+
+
+def _shallow_size(obj: Any, seen: set[int]) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    return sys.getsizeof(obj)
+
+
+def _deep_size(obj: Any, seen: set[int]) -> int:
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (DocItem, DocMapping)):
+            # These are accounted for separately.
+            continue
+        if isinstance(obj, Mapping):
+            stack += obj.keys()
+            stack += obj.values()
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack += obj
+        elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+            stack.append(vars(obj))
+    return size
@@ -0,0 +1,74 @@
+"""Laying out a page for each type of the doc tree, along with the navigation between them.
+
+This is what the `crystal-api` MkDocs plugin is based on (see [Extras](extras.md#generating-api-pages)).
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import posixpath
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .items import DocType
+
+LAYOUTS = ("nested", "flat")
+"""The possible structures of the navigation.
+
+* `nested` - each type's page is followed by the pages of the types nested in it, as a section titled by the type's name.
+* `flat` - all pages in one list (in the same order), each titled by the type's full identifier.
+"""
+
+
+@dataclasses.dataclass
+class ApiPage:
+    """The page that documents one type."""
+
+    item: DocType
+    path: str
+    """The path of the Markdown file that the page pretends to be, e.g. `api/Foo/Bar.md`."""
+    title: str
+    edit_url: str | None
+    """The URL of the type's source code, for the page's "edit" button."""
+    children: list[ApiPage] = dataclasses.field(default_factory=list)
+    """The pages of the types nested in this one, in the `nested` layout."""
+
+
+def generate(
+    root: DocType, directory: str = "", layout: str = "nested"
+) -> tuple[list[ApiPage], list[ApiPage]]:
+    """Make a page for every type under `root`, in one walk over the tree.
+
+    A type gets the path `Foo/Bar.md` (within `directory`), mirroring the URLs of `crystal doc`'s own site. Types without any locations (such as the stubs left by the [`prune`](configuration.md#prune) option) don't get a page, but the types nested in them still do.
+
+    Returns:
+        All the pages, in the order of the navigation, and the top-level entries of the navigation.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}, expected one of {LAYOUTS}")
+    pages: list[ApiPage] = []
+    nav = _walk(root, directory, layout, pages)
+    return pages, nav
+
+
+def _walk(typ: DocType, directory: str, layout: str, pages: list[ApiPage]) -> list[ApiPage]:
+    entries = []
+    for sub in typ.types:
+        if not sub.locations:
+            entries += _walk(sub, directory, layout, pages)
+            continue
+        path = posixpath.join(directory, *sub.abs_id.split("::")) + ".md"
+        page = ApiPage(
+            sub,
+            path,
+            title=sub.name if layout == "nested" else sub.abs_id,
+            edit_url=sub.locations[0].url,
+        )
+        pages.append(page)
+        entries.append(page)
+        children = _walk(sub, directory, layout, pages)
+        if layout == "nested":
+            page.children = children
+        else:
+            entries += children
+    return entries
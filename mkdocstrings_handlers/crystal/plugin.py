@@ -0,0 +1,155 @@
+"""The `crystal-api` MkDocs plugin, which adds a page for each type to the site, along with their navigation.
+
+This replaces a [gen-files](https://oprypin.github.io/mkdocs-gen-files) script that writes a `::: identifier` stub for each type: the pages are laid out in one walk over the doc tree (see [`pages`][mkdocstrings_handlers.crystal.pages]), and all of them are rendered in one [batch][mkdocstrings_handlers.crystal.renderer.CrystalRenderer.render_batch], without a directive on each page.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import markdown
+from markdown.extensions.toc import nest_toc_tokens
+from mkdocs.config import config_options as c
+from mkdocs.config.base import Config
+from mkdocs.exceptions import PluginError
+from mkdocs.plugins import BasePlugin
+from mkdocs.structure.files import File, Files, InclusionLevel
+from mkdocs.structure.nav import Section
+from mkdocs.structure.pages import Page
+from mkdocs.structure.toc import get_toc
+
+from . import CrystalHandler, pages
+
+if TYPE_CHECKING:
+    from mkdocs.config.defaults import MkDocsConfig
+    from mkdocs.structure.nav import Navigation
+
+    from .renderer import RenderedItem
+
+
+class _PluginConfig(Config):
+    directory = c.Type(str, default="")
+    layout = c.Choice(pages.LAYOUTS, default="nested")
+    nav_title = c.Type(str, default="API")
+    options = c.Type(dict, default={})
+
+
+class CrystalApiPlugin(BasePlugin[_PluginConfig]):
+    _handler: CrystalHandler
+    _pages: list[pages.ApiPage]
+    _nav: list[pages.ApiPage]
+    _files: dict[str, File]
+    _by_path: dict[str, pages.ApiPage]
+    _rendered: dict[str, RenderedItem] | None = None
+
+    def on_files(self, files: Files, *, config: MkDocsConfig) -> Files:
+        try:
+            mkdocstrings = config.plugins["mkdocstrings"]
+        except KeyError:
+            raise PluginError("The `crystal-api` plugin requires the `mkdocstrings` plugin")
+        handler = mkdocstrings.get_handler("crystal")  # type: ignore[attr-defined]
+        assert isinstance(handler, CrystalHandler)
+        self._handler = handler
+        # The files have to be known now, so this can't wait for the first directive like the handler does.
+        self._pages, self._nav = pages.generate(
+            handler.root, self.config.directory, self.config.layout
+        )
+        self._by_path = {p.path: p for p in self._pages}
+        self._rendered = None
+
+        self._files = {}
+        for page in self._pages:
+            if (existing := files.get_file_from_path(page.path)) is not None:
+                files.remove(existing)
+            # The content is rendered directly, see `on_page_content`.
+            # The navigation gets its own section instead, see `on_nav`.
+            file = File.generated(
+                config, page.path, content="", inclusion=InclusionLevel.NOT_IN_NAV
+            )
+            files.append(file)
+            self._files[page.path] = file
+        return files
+
+    def on_nav(self, nav: Navigation, *, config: MkDocsConfig, files: Files) -> Navigation:
+        new_pages: list[Page] = []
+        section = Section(
+            self.config.nav_title, [self._nav_item(p, config, new_pages) for p in self._nav]
+        )
+        _add_parent_links(section)
+        nav.items.append(section)
+
+        all_pages = [*nav.pages, *new_pages]
+        for prev, page in zip(all_pages, all_pages[1:]):
+            prev.next_page = page
+            page.previous_page = prev
+        nav.pages += new_pages
+        return nav
+
+    def _nav_item(
+        self, page: pages.ApiPage, config: MkDocsConfig, new_pages: list[Page]
+    ) -> Page | Section:
+        item = Page(page.title, self._files[page.path], config)
+        new_pages.append(item)
+        if not page.children:
+            return item
+        children = [self._nav_item(p, config, new_pages) for p in page.children]
+        return Section(page.title, [item, *children])
+
+    def on_page_content(
+        self, html: str, *, page: Page, config: MkDocsConfig, files: Files
+    ) -> str | None:
+        api_page = self._by_path.get(page.file.src_uri)
+        if api_page is None:
+            return None
+        if self._rendered is None:
+            self._rendered = self._render_all(config)
+        result = self._rendered.pop(api_page.item.abs_id)
+
+        # What mkdocstrings would do for a `::: identifier` directive on the page.
+        autorefs: Any = config.plugins["autorefs"]
+        for anchor in result.anchors:
+            autorefs.register_anchor(page, anchor)
+        page.toc = get_toc(
+            nest_toc_tokens(
+                [
+                    {
+                        "level": int(h.tag[1]),
+                        "id": h.attrib["id"],
+                        "name": h.attrib["data-toc-label"],
+                    }
+                    for h in result.headings
+                    # Not the anchors of compact constants tables.
+                    if h.tag != "a"
+                ]
+            )
+        )
+        if api_page.edit_url and (config.edit_uri or config.edit_uri_template):
+            page.edit_url = api_page.edit_url
+        return result.html
+
+    def _render_all(self, config: MkDocsConfig) -> dict[str, RenderedItem]:
+        mkdocstrings: Any = config.plugins["mkdocstrings"]
+        options = {
+            **mkdocstrings.handlers.get_handler_config("crystal").get("options", {}),
+            # Same as a `# ::: identifier` heading, unless overridden.
+            "heading_level": 1,
+            **self.config.options,
+        }
+        # Set up once for all the pages, rather than by mkdocstrings for each one.
+        self._handler._update_env(
+            markdown.Markdown(),
+            {"mdx": config.markdown_extensions, "mdx_configs": config.mdx_configs},
+        )
+        results = self._handler.render_batch(
+            [p.item for p in self._pages],
+            options,
+            page_urls={p.item.abs_id: self._files[p.path].url for p in self._pages},
+        )
+        return {r.item.abs_id: r for r in results}
+
+
+def _add_parent_links(section: Section) -> None:
+    for child in section.children:
+        child.parent = section
+        if isinstance(child, Section):
+            _add_parent_links(child)
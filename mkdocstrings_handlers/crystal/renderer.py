@@ -1,27 +1,76 @@
 from __future__ import annotations
 
 import contextlib
+import copy
+import dataclasses
+import functools
+import hashlib
+import itertools
+import json
+import os
+import re
 import xml.etree.ElementTree as etree
-from collections.abc import Mapping
-from typing import TYPE_CHECKING, Any
+from collections.abc import Iterable, Mapping, Sequence
+from functools import cached_property
+from html import unescape
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 import jinja2
-import markdown_callouts
 from markdown.treeprocessors import Treeprocessor
-from markupsafe import Markup
+from markupsafe import Markup, escape
 from mkdocstrings.handlers import base
 
 from . import crystal_html
+from .collector import DocView
+from .items import DocItem, DocType
 
 if TYPE_CHECKING:
     from markdown import Markdown
+    from mkdocs.config.defaults import MkDocsConfig
 
-    from .items import DocItem, DocPath
+    from .items import DocLocation, DocPath
+    from .sources import SourceCache
+
+
+_TEMPLATE_MACROS = {
+    "method.html": "render_method",
+    "method_details.html": "render_details",
+    "constant.html": "render_constant",
+    "constants_table.html": "render_constants_table",
+}
+"""The macro that each template defines, which the other templates import."""
 
 
 class CrystalRenderer(base.BaseHandler):
     fallback_theme = "material"
 
+    _dependencies: _Dependencies | None = None
+    _highlight_patched = False
+    _current_root: DocItem | None = None
+    _current_fragments: dict[str, str] | None = None
+    _env_signature: str | None = None
+    _batch_page_url: str | None = None
+
+    def __init__(
+        self,
+        *,
+        incremental: bool = False,
+        search_index: bool = False,
+        mkdocs_config: MkDocsConfig | None = None,
+    ):
+        """Set up the rendering part of the handler.
+
+        Params:
+            incremental: Whether to reuse the HTML of directives rendered by an earlier build (within the same process) if nothing they depend on has changed. Otherwise the HTML is kept only until the end of the build.
+            search_index: Whether to add an entry for each item on the site to the search index.
+            mkdocs_config: The config of the site being built, to know where to write extra files.
+        """
+        self._incremental = incremental
+        self._search_index = search_index
+        self._mkdocs_config = mkdocs_config
+        # The details of members for the `lazy_members` option, by fragment name.
+        self._fragments: dict[str, _Fragment] = {}
+
     @property
     def collector(self):
         return self
@@ -29,22 +78,154 @@ class CrystalRenderer(base.BaseHandler):
     def render(self, data: DocItem, config: Mapping[str, Any]) -> str:
         subconfig = {
             "show_source_links": True,
+            "show_source": False,
+            "show_used_by": True,
+            "compact_constants": 100,
+            "lazy_members": False,
+            "compact_html": False,
             "heading_level": 2,
             **config,
         }
+        headings_start = len(self._headings)
+        self._current_fragments = {}
+        try:
+            html, fragments = self._render_cached(data, subconfig)
+        finally:
+            self._current_fragments = None
+
+        # The HTML is rendered (and cached) the same for all versions, only the ids get distinguished.
+        if prefix := self._version_prefix(data):
+            html = _prefix_ids(html, prefix)
+            for heading in self._headings[headings_start:]:
+                heading.set("id", prefix + heading.attrib["id"])
+            fragments = {member: _prefix_ids(h, prefix) for member, h in fragments.items()}
+
+        if fragments:
+            # The same item can be on several pages, and the links in its fragments are relative to each.
+            page_url = self._current_page_url()
+            name = hashlib.blake2b(
+                f"{page_url}#{prefix}{data.abs_id}".encode(), digest_size=10
+            ).hexdigest()
+            self._fragments[name] = _Fragment(page_url, fragments)
+            html = str(html).replace('data-fragment=""', f'data-fragment="{name}"')
+            # The page being rendered (and each one after it) will load the script that fetches the fragments.
+            if self._mkdocs_config is not None:
+                script = f"assets/{FRAGMENTS_DIR}/{_FRAGMENTS_SCRIPT}"
+                if script not in self._mkdocs_config.extra_javascript:
+                    self._mkdocs_config.extra_javascript.append(script)
+        return html
+
+    def _render_cached(
+        self, data: DocItem, subconfig: Mapping[str, Any]
+    ) -> tuple[str, dict[str, str]]:
+        fragments = self._current_fragments
+        assert fragments is not None
+        if not self._incremental and self.collector._default_version is None:
+            # Otherwise the cache is still used within the build, to share the HTML between versions.
+            return self._render(data, subconfig), fragments
+
+        key: tuple[str, ...] = (
+            self._render_signature,
+            data.abs_id,
+            _config_key(_without_version(data.config) if isinstance(data, DocView) else {}),
+            _config_key(_without_version(subconfig)),
+        )
+        if self.collector._default_version is not None:
+            # Keep the variants from all versions, so that each can be reused in any other version
+            # whose source URLs are the same.
+            key += (data.fingerprint, _source_urls_key(data.root))
+        cached = _render_cache.get(key)
+        if cached is not None and cached.dependencies.is_valid(data, data.root):
+            self._headings.extend(copy.deepcopy(cached.headings))
+            return cached.html, cached.fragments
+
+        headings_start = len(self._headings)
+        self._dependencies = deps = _Dependencies(data)
+        try:
+            html = self._render(data, subconfig)
+        finally:
+            self._dependencies = None
+        _render_cache[key] = _CachedRender(
+            html, copy.deepcopy(self._headings[headings_start:]), fragments, deps
+        )
+        return html, fragments
+
+    def _render(self, data: DocItem, subconfig: Mapping[str, Any]) -> str:
         template = self.env.get_template(data._TEMPLATE)
 
         with self._monkeypatch_highlight_function(default_lang="crystal"):
-            return template.render(
-                config=subconfig,
-                obj=data,
-                heading_level=subconfig["heading_level"],
-                root=True,
-            )
+            # References get resolved within the same version as the item.
+            self._current_root = data.root
+            try:
+                html = template.render(
+                    config=subconfig,
+                    obj=data,
+                    heading_level=subconfig["heading_level"],
+                    root=True,
+                )
+            finally:
+                self._current_root = None
+        if subconfig["compact_html"]:
+            html = _compact_html(html)
+            fragments = self._current_fragments
+            if fragments:
+                fragments.update((member, _compact_html(h)) for member, h in fragments.items())
+        return html
 
-    @classmethod
-    def get_anchors(cls, data: DocItem) -> tuple[str, ...]:
-        return (data.abs_id,)
+    def _current_page_url(self) -> str | None:
+        if self._batch_page_url is not None:
+            return self._batch_page_url
+        if self._mkdocs_config is None:
+            return None
+        autorefs = self._mkdocs_config.plugins.get("autorefs")
+        # A `Page` (rather than its URL) since mkdocs-autorefs 1.0.
+        page = getattr(autorefs, "current_page", None)
+        return page.url if page is not None else None
+
+    def _version_prefix(self, data: DocItem) -> str:
+        """The prefix for HTML ids of items from any version other than the main one."""
+        return self._version_prefix_for(
+            data.config.get("version") if isinstance(data, DocView) else None
+        )
+
+    def _version_prefix_for(self, version: str | None) -> str:
+        if version is None or version == self.collector._default_version:
+            return ""
+        return f"{version}/"
+
+    def render_batch(
+        self,
+        items: Iterable[DocItem],
+        config: Mapping[str, Any] = {},
+        page_urls: Mapping[str, str] = {},
+    ) -> list[RenderedItem]:
+        """Render many items in one go, such as all of [`root.walk_types()`][mkdocstrings_handlers.crystal.items.DocType.walk_types] to generate a page for each.
+
+        This is equivalent to a `::: identifier` directive for each of them, but skips the per-directive overhead. The Markdown environment must have already been set up by *mkdocstrings* (or through `update_env`).
+
+        Params:
+            items: The items to render, as found in the [`root`][mkdocstrings_handlers.crystal.collector.CrystalCollector.root].
+            config: The options, same as can be passed to each directive.
+            page_urls: The URL of the page that each item (by `abs_id`) is going to be on, if not the page currently being built.
+        Returns:
+            The result for each item, in the same order.
+        """
+        results = []
+        with self._monkeypatch_highlight_function(default_lang="crystal"):
+            for item in items:
+                headings_start = len(self._headings)
+                self._batch_page_url = page_urls.get(item.abs_id)
+                try:
+                    html = self.render(self.collector.view(item, config), config)
+                finally:
+                    self._batch_page_url = None
+                headings = self._headings[headings_start:]
+                del self._headings[headings_start:]
+                results.append(RenderedItem(item, html, headings))
+        return results
+
+    def get_anchors(self, data: DocItem) -> tuple[str, ...]:
+        return (self._version_prefix(data) + data.abs_id,)
 
     def update_env(self, md: Markdown, config: dict) -> None:
         super().update_env(md, config)
@@ -60,16 +241,80 @@ class CrystalRenderer(base.BaseHandler):
         md.inlinePatterns.deregister("html")
 
         md.treeprocessors.register(_RefInsertingTreeprocessor(md), "mkdocstrings_crystal_xref", 12)
+        import markdown_callouts
+
         markdown_callouts.CalloutsExtension().extendMarkdown(md)
 
         self.env.trim_blocks = True
         self.env.lstrip_blocks = True
         self.env.keep_trailing_newline = False
         self.env.undefined = jinja2.StrictUndefined
+        if (cache_dir := self.collector._cache_dir) is not None:
+            # Keep the compiled templates across builds. Each one is still checked against its source.
+            bytecode_dir = os.path.join(cache_dir, "templates")
+            os.makedirs(bytecode_dir, exist_ok=True)
+            self.env.bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_dir)
 
         self.env.filters["code_highlight"] = self.do_code_highlight
         self.env.filters["convert_markdown_ctx"] = self.do_convert_markdown_ctx
+        self.env.filters["convert_markdown_bulk"] = self.do_convert_markdown_bulk
+        self.env.filters["anchor"] = self.do_anchor
+        self.env.filters["fragment"] = self.do_fragment
         self.env.filters["reference"] = self.do_reference
+        self.env.filters["source_snippet"] = self.do_source_snippet
+        self.env.filters["used_by"] = self.do_used_by
+        self.env.globals["legacy_templates"] = self._legacy_templates
+
+        signature = (
+            [ext if isinstance(ext, str) else type(ext).__name__ for ext in config["mdx"]],
+            config["mdx_configs"],
+            self._templates_signature,
+        )
+        if (env_signature := _config_key(signature)) != self._env_signature:
+            self._env_signature = env_signature
+            vars(self).pop("_render_signature", None)
+
+    @cached_property
+    def _render_signature(self) -> str:
+        """Identifies everything that all rendered HTML depends on, as part of the key of the cache."""
+        signature = (
+            self._env_signature,
+            # The handler options that get baked into the HTML, such as source URLs.
+            # Only known for sure once the doc tree is loaded, which happens before the first render.
+            self.collector._snapshot_inputs,
+            self.collector._source_url_inputs(),
+        )
+        result = _config_key(signature)
+        if _render_cache and next(iter(_render_cache))[0] != result:
+            # Nothing from earlier builds can be reused, so no point holding on to it.
+            _render_cache.clear()
+        return result
+
+    @cached_property
+    def _templates_signature(self) -> list[tuple[str, str | None, float | None]]:
+        """The files of all templates and their modification times, to notice when they're overridden or edited."""
+        result = []
+        loader = self.env.loader
+        assert loader is not None
+        for name in self.env.list_templates():
+            _, filename, _ = loader.get_source(self.env, name)
+            result.append((name, filename, os.path.getmtime(filename) if filename else None))
+        return result
+
+    @cached_property
+    def _legacy_templates(self) -> frozenset[str]:
+        """The templates overridden through `custom_templates` in the older style that doesn't define a macro, so they get included instead."""
+        own_dir = os.path.join(os.path.dirname(__file__), "templates", "")
+        result = set()
+        for name, filename, _ in self._templates_signature:
+            macro = _TEMPLATE_MACROS.get(name)
+            if macro is None or not filename or filename.startswith(own_dir):
+                continue
+            with open(filename, encoding="utf-8") as f:
+                tree = self.env.parse(f.read(), name, filename)
+            if not any(node.name == macro for node in tree.find_all(jinja2.nodes.Macro)):
+                result.add(name)
+        return frozenset(result)
 
     def do_code_highlight(self, code, *, title: str = "", **kwargs) -> str:
         text = str(code)
@@ -87,37 +332,152 @@ class CrystalRenderer(base.BaseHandler):
             html = html.replace(tag_end, tag_end + prefix, 1)
         return html
 
-    def do_reference(self, path: str | DocPath, text: str | None = None) -> str:
+    def do_reference(self, path: str | DocPath | DocItem, text: str | None = None) -> str:
+        if isinstance(path, DocItem):
+            # Already found, nothing to look up.
+            return Markup('<span data-autorefs-optional="{}">{}</span>').format(
+                path.abs_id, path.abs_id if text is None else text
+            )
         if text is None:
             text = str(path)
         if "(" in str(path):
             return text
         try:
-            ref_obj = self.collector.root.lookup(path)
+            ref_obj = (self._current_root or self.collector.root).lookup(path)
         except base.CollectionError:
+            ref_obj = None
+        if self._dependencies is not None:
+            self._dependencies.record_lookup(None, str(path), ref_obj)
+        if ref_obj is None:
             return text
         else:
             return Markup('<span data-autorefs-optional="{}">{}</span>').format(
                 ref_obj.abs_id, text
             )
 
+    def do_used_by(self, typ: DocType) -> Sequence[DocItem]:
+        result = typ.used_by
+        if self._dependencies is not None:
+            self._dependencies.used_by[typ.abs_id] = [item.abs_id for item in result]
+        return result
+
+    def do_source_snippet(self, location: DocLocation) -> str | None:
+        if self._dependencies is not None:
+            self._dependencies.files[location.filename] = self._sources.stat(location.filename)
+        return self._sources.snippet(location)
+
+    @cached_property
+    def _sources(self) -> SourceCache:
+        from .sources import SourceCache
+
+        return SourceCache()
+
+    def teardown(self) -> None:
+        if self._fragments and self._mkdocs_config is not None:
+            self._write_fragments(
+                os.path.join(self._mkdocs_config["site_dir"], "assets", FRAGMENTS_DIR)
+            )
+        if self._search_index and self._mkdocs_config is not None:
+            self._write_search_index(self._mkdocs_config["site_dir"])
+        if "_sources" in vars(self):
+            self._sources.close()
+            del self._sources
+        if not self._incremental:
+            _render_cache.clear()
+        super().teardown()
+
     def do_convert_markdown_ctx(
         self, text: str, context: DocItem, heading_level: int, html_id: str
     ):
         p: _RefInsertingTreeprocessor = self._md.treeprocessors["mkdocstrings_crystal_xref"]  # type: ignore[assignment]
         p.context = context
+        p.dependencies = self._dependencies
         return super().do_convert_markdown(text, heading_level=heading_level, html_id=html_id)
 
+    def do_convert_markdown_bulk(
+        self, items: Iterable[DocItem], context: DocItem, heading_level: int, html_id: str
+    ) -> list[Markup]:
+        """Convert the docs of many items in one go, which is a lot faster than one by one."""
+        docs = [item.doc or "" for item in items]
+        text = "\n\n".join(f"{doc}\n\n{_BULK_SEPARATOR}" for doc in docs)
+        parts = self.do_convert_markdown_ctx(text, context, heading_level, html_id).split(
+            f"<p>{_BULK_SEPARATOR}</p>"
+        )[:-1]
+        if len(parts) == len(docs):
+            return [Markup(part.strip()) for part in parts]  # noqa: S704
+        # Some doc swallowed a separator (e.g. an unclosed code block), so they have to be taken apart.
+        return [
+            self.do_convert_markdown_ctx(doc, context, heading_level, html_id) if doc else Markup()
+            for doc in docs
+        ]
+
+    def do_anchor(self, anchor_id: str) -> str:
+        """Register an anchor for cross-references, without it appearing in the table of contents."""
+        # It's reported along with the headings, but only actual <h*> elements get into the ToC.
+        self._headings.append(etree.Element("a", {"id": anchor_id}))
+        return anchor_id
+
+    def do_fragment(self, html: str, item: DocItem) -> str:
+        """Set aside the details of a member, to be loaded by the page only once they're expanded."""
+        assert self._current_fragments is not None
+        self._current_fragments[item.abs_id] = html
+        # Headings within the details (e.g. in a doc comment) aren't on the page, so they can't be linked to.
+        ids = {unescape(i) for i in _HEADING_ID.findall(html)}
+        while self._headings and self._headings[-1].get("id") in ids:
+            self._headings.pop()
+        return ""
+
+    def _write_fragments(self, directory: str) -> None:
+        """Write the details of members (for the `lazy_members` option) as JSON files into `directory`."""
+        url_mapper = None
+        if self._mkdocs_config is not None and "autorefs" in self._mkdocs_config.plugins:
+            url_mapper = self._mkdocs_config.plugins["autorefs"].get_item_url  # type: ignore[attr-defined]
+        os.makedirs(directory, exist_ok=True)
+        for name, fragment in self._fragments.items():
+            members = fragment.members
+            if url_mapper is not None:
+                # These don't go through the page, so the cross-references get resolved here instead.
+                from mkdocs_autorefs.references import fix_refs
+
+                mapper = functools.partial(url_mapper, from_url=fragment.page_url)
+                members = {member: fix_refs(h, mapper)[0] for member, h in members.items()}
+            with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(members, f, ensure_ascii=False)
+        with open(os.path.join(directory, _FRAGMENTS_SCRIPT), "w", encoding="utf-8") as f:
+            f.write(self.env.get_template(_FRAGMENTS_SCRIPT).render())
+
+    def _write_search_index(self, site_dir: str) -> None:
+        from . import search
+
+        assert self._mkdocs_config is not None
+        autorefs = self._mkdocs_config.plugins["autorefs"]
+
+        def url_mapper(identifier: str) -> str:
+            return autorefs.get_item_url(identifier)[0]  # type: ignore[attr-defined]
+
+        roots = self.collector.roots or {None: self.collector.root}
+        search.merge(
+            site_dir,
+            itertools.chain.from_iterable(
+                search.entries(root, url_mapper, self._version_prefix_for(name))
+                for name, root in roots.items()
+            ),
+        )
+
     def _monkeypatch_highlight_function(self, default_lang: str):
         """Changes 'pymdownx.highlight' extension to use this lang by default."""
         # Yes, there really isn't a better way. I'd be glad to be proven wrong.
-        if self._pymdownx_hl:
+        if self._pymdownx_hl and not self._highlight_patched:
             old = self._pymdownx_hl.highlight
 
             def new(self, src="", language="", *args, **kwargs):
                 return old(self, src, language or default_lang, *args, **kwargs)
 
-            return _monkeypatch(self._pymdownx_hl, "highlight", new)
+            stack = contextlib.ExitStack()
+            stack.enter_context(_monkeypatch(self._pymdownx_hl, "highlight", new))
+            # Nested calls (from `render_batch` into `render`) don't need to patch it again.
+            stack.enter_context(_monkeypatch(self, "_highlight_patched", True))  # noqa: FBT003
+            return stack
         return contextlib.nullcontext()
 
 
@@ -131,12 +491,191 @@ def _monkeypatch(obj, attr, func):
         setattr(obj, attr, old)
 
 
+@dataclasses.dataclass
+class RenderedItem:
+    """The result of [`render_batch`][mkdocstrings_handlers.crystal.renderer.CrystalRenderer.render_batch] for one item."""
+
+    item: DocItem
+    html: str
+    """The HTML, same as what a `::: identifier` directive would insert into the page."""
+    headings: list[etree.Element]
+    """The headings within the HTML, for the page's table of contents. Along with them are the `<a>` anchors of the rows of [`compact_constants`](configuration.md#options) tables, which don't belong in the table of contents."""
+
+    @property
+    def anchors(self) -> list[str]:
+        """The HTML ids of all headings in the HTML, starting with the item itself, to register with *mkdocs-autorefs*."""
+        return [heading.attrib["id"] for heading in self.headings]
+
+
+FRAGMENTS_DIR = "_mkdocstrings_crystal"
+"""The directory (within `assets` of the site) to write the details of members into, for the `lazy_members` option."""
+
+_FRAGMENTS_SCRIPT = "lazy_members.js"
+
+_BULK_SEPARATOR = "mkdocstrings-crystal-bulk-separator"
+
+
+def _config_key(config: Any) -> str:
+    return json.dumps(config, sort_keys=True, default=repr)
+
+
+def _source_urls_key(root: DocItem) -> str:
+    """Identifies the source URLs of the version that `root` belongs to, which get baked into the HTML."""
+    return _config_key(
+        [
+            (d.src_path, d.dest_url, d.referenced_values())
+            for d in getattr(root, "source_locations", ())
+        ]
+    )
+
+
+def _without_version(config: Mapping[str, Any]) -> dict[str, Any]:
+    # The version doesn't affect the HTML, see `_prefix_ids`.
+    return {k: v for k, v in config.items() if k != "version"}
+
+
+_ID_ATTRS = re.compile(r'(?<=\s)(?:id|data-autorefs-optional|data-autorefs-identifier)="|href="#')
+
+
+def _prefix_ids(html: str, prefix: str) -> str:
+    """Prepend `prefix` to all ids in the HTML, and to references to them."""
+    prefix = str(escape(prefix))
+    return Markup(_ID_ATTRS.sub(lambda m: m[0] + prefix, html))  # noqa: S704
+
+
+_COMPACT_CLASSES = {
+    "doc": None,
+    "doc-object": "d",
+    "doc-heading": "dh",
+    "doc-contents": "dc",
+    "doc-children": "dch",
+    "first": "d1",
+    "doc-type": "dt",
+    "doc-constant": "dk",
+    "doc-method": "dm",
+    "doc-constructor": "dmn",
+    "doc-class_method": "dmc",
+    "doc-instance_method": "dmi",
+    "doc-macro": "dmm",
+    "doc-title": "dn",
+    "doc-source": "ds",
+    "doc-source-link": "dl",
+    "doc-lazy": "dz",
+    "doc-constants-table": "dct",
+}
+"""The short class names used by the `compact_html` option (`None` = drop the class)."""
+
+_HEADING_ID = re.compile(r'<h[1-6]\b[^>]*\sid="([^"]*)"')
+_PRE = re.compile(r"(<pre\b.*?</pre>)", re.DOTALL)
+_SPACE = re.compile(r"\s+")
+_SPACE_AROUND_BLOCKS = re.compile(
+    r" ?(</?(?:div|h[1-6]|p|br|table|thead|tbody|tr|th|td|details|summary|ul|ol|li)\b[^>]*>) ?"
+)
+_CLASS_ATTR = re.compile(r' class="([^"]*)"')
+_WHITESPACE_TOKEN = re.compile(r'<span class="w">(\s*)</span>')
+_EMPTY_CONTENTS = re.compile(r'<div class="dc(?: d1)?"></div>')
+
+
+def _compact_html(html: str) -> str:
+    """Make the HTML smaller without changing how it looks: collapse whitespace, shorten class names and drop empty wrappers.
+
+    Pre-formatted blocks are kept as is, other than unwrapping whitespace tokens of the highlighter.
+    """
+    parts = _PRE.split(html)
+    for i, part in enumerate(parts):
+        if i % 2:
+            parts[i] = _WHITESPACE_TOKEN.sub(r"\1", part)
+        else:
+            part = _SPACE.sub(" ", part)
+            part = _SPACE_AROUND_BLOCKS.sub(r"\1", part)
+            part = _CLASS_ATTR.sub(_compact_class_attr, part)
+            part = _EMPTY_CONTENTS.sub("", part)
+            parts[i] = _WHITESPACE_TOKEN.sub(r"\1", part)
+    return Markup("".join(parts).strip())  # noqa: S704
+
+
+def _compact_class_attr(match: re.Match[str]) -> str:
+    classes = dict.fromkeys(_COMPACT_CLASSES.get(c, c) for c in match[1].split())
+    classes.pop(None, None)
+    return f' class="{" ".join(classes)}"' if classes else ""  # type: ignore[arg-type]
+
+
+@dataclasses.dataclass
+class _CachedRender:
+    html: str
+    headings: list[etree.Element]
+    fragments: dict[str, str]
+    dependencies: _Dependencies
+
+
+class _Fragment(NamedTuple):
+    page_url: str | None
+    """The page that links to the fragment, for resolving relative links in it."""
+    members: dict[str, str]
+    """The HTML of the details of each member, by its `abs_id`."""
+
+
+_render_cache: dict[tuple[str, ...], _CachedRender] = {}
+"""HTML of directives rendered so far, kept across builds -- for `mkdocs serve`, where the handler is re-created each time."""
+
+
+class _Dependencies:
+    """What a rendered directive has read from the doc tree.
+
+    That is: the item itself (along with all its sub-items, through its fingerprint), and the outcome of every identifier resolved from it.
+    """
+
+    def __init__(self, item: DocItem):
+        self.abs_id = item.abs_id
+        self.fingerprint = item.fingerprint
+        self.lookups: dict[tuple[str | None, str], str | None] = {}
+        self.files: dict[str, tuple[int, int] | None] = {}
+        self.used_by: dict[str, list[str]] = {}
+
+    def record_lookup(self, context: DocItem | None, identifier: str, result: DocItem | None):
+        context_id = context.abs_id if context is not None else None
+        self.lookups[context_id, identifier] = result.abs_id if result is not None else None
+
+    def is_valid(self, item: DocItem, root: DocItem) -> bool:
+        """Whether rendering `item` (found in the new `root`) would still give the same result."""
+        if item.abs_id != self.abs_id or item.fingerprint != self.fingerprint:
+            return False
+        from .sources import file_stat
+
+        if any(file_stat(f) != stat for f, stat in self.files.items()):
+            return False
+        for type_id, used_by in self.used_by.items():
+            typ = _try_lookup(root, type_id)
+            if not isinstance(typ, DocType) or [i.abs_id for i in typ.used_by] != used_by:
+                return False
+        contexts: dict[str | None, DocItem | None] = {None: root, "": root}
+        for (context_id, identifier), result_id in self.lookups.items():
+            if context_id is not None and context_id not in contexts:
+                contexts[context_id] = _try_lookup(root, context_id)
+            context = contexts[context_id]
+            if context is None:
+                return False
+            result = _try_lookup(context, identifier)
+            if (result.abs_id if result is not None else None) != result_id:
+                return False
+        return True
+
+
+def _try_lookup(item: DocItem, identifier: str) -> DocItem | None:
+    try:
+        return item.lookup(identifier)
+    except base.CollectionError:
+        return None
+
+
 class _RefInsertingTreeprocessor(Treeprocessor):
     context: DocItem | None
+    dependencies: _Dependencies | None
 
     def __init__(self, md):
         super().__init__(md)
         self.context = None
+        self.dependencies = None
 
     def run(self, root: etree.Element):
         for i, el in enumerate(root):
@@ -145,9 +684,11 @@ class _RefInsertingTreeprocessor(Treeprocessor):
                 continue
 
             assert self.context, "Bug: `CrystalRenderer` should have set the `context` member"
-            try:
-                ref_obj = self.context.lookup("".join(el.itertext()))
-            except base.CollectionError:
+            identifier = "".join(el.itertext())
+            ref_obj = _try_lookup(self.context, identifier)
+            if self.dependencies is not None:
+                self.dependencies.record_lookup(self.context, identifier, ref_obj)
+            if ref_obj is None:
                 continue
 
             # Replace the `code` with a new `span` (need to propagate the tail too).
@@ -0,0 +1,97 @@
+"""Entries for the site's search index, made directly from the doc tree rather than from the rendered pages.
+
+The built-in `search` plugin of MkDocs (and the one of *mkdocs-material*) splits each page into sections by its headings. On API pages, this makes whole types with all their members into single entries of the index. Instead, there can be one small entry per item, pointing directly at its anchor.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import urllib.parse
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING
+
+from markupsafe import escape
+
+if TYPE_CHECKING:
+    from .items import DocType
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+INDEX_FILE = os.path.join("search", "search_index.json")
+"""Where the `search` plugin writes the index, relative to the site directory."""
+
+SUMMARY_LENGTH = 200
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def entries(
+    root: DocType, url_mapper: Callable[[str], str], prefix: str = ""
+) -> Iterator[dict[str, str]]:
+    """Produce an entry of the search index for each item under `root` that is on the site.
+
+    Params:
+        url_mapper: Gives the URL (relative to the site) of an item's anchor, or raises `KeyError` if it isn't on the site.
+        prefix: Prepended to each `abs_id` to get its anchor (see the `versions` option).
+    """
+    for item in root.walk_items():
+        if item.parent is None:
+            continue
+        try:
+            location = url_mapper(prefix + item.abs_id)
+        except KeyError:
+            continue
+        parts = urllib.parse.urlsplit(location)
+        if parts.scheme or parts.netloc:
+            continue
+        yield {
+            "location": location,
+            "title": item.abs_id,
+            "text": str(escape(summary(item.doc))),
+            "kind": item.kind,
+        }
+
+
+def summary(doc: str | None) -> str:
+    """The first paragraph of the doc, on one line, shortened to `SUMMARY_LENGTH`."""
+    if not doc:
+        return ""
+    text = _WHITESPACE.sub(" ", doc.strip().split("\n\n", 1)[0])
+    if len(text) > SUMMARY_LENGTH:
+        text = text[: SUMMARY_LENGTH - 1].rsplit(" ", 1)[0] + "…"
+    return text
+
+
+def merge(site_dir: str, new_entries: Iterable[dict[str, str]]) -> None:
+    """Add the entries into the search index that was already written into `site_dir`.
+
+    Any existing entries for the same locations (the sections of the rendered pages starting at these anchors) are replaced. The entries of the whole pages that contain these items keep only their titles, as their text would again have all the items in it.
+    """
+    path = os.path.join(site_dir, INDEX_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        log.warning(
+            "Not adding API items to the search index: %r not found. "
+            "The 'search' plugin must be listed before 'mkdocstrings'.",
+            path,
+        )
+        return
+    new_entries = list(new_entries)
+    locations = {entry["location"] for entry in new_entries}
+    pages = {location.split("#", 1)[0] for location in locations}
+    docs = []
+    for entry in index["docs"]:
+        if entry["location"] in locations:
+            continue
+        if entry["location"] in pages:
+            entry["text"] = ""
+        docs.append(entry)
+    index["docs"] = docs + new_entries
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    log.debug("Added %d API items to the search index", len(new_entries))
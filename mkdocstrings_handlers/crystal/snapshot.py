@@ -0,0 +1,90 @@
+"""Saving the fully materialized doc tree to disk, so that later runs can skip building it again."""
+
+from __future__ import annotations
+
+import contextlib
+import gc
+import logging
+import mmap
+import os
+import pickle
+import tempfile
+from collections.abc import Generator
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .items import DocType
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+FILENAME = "doc-tree.pickle"
+
+FORMAT = 2
+"""Part of the key of a snapshot, to be changed whenever the pickled form of the items changes."""
+
+
+def materialize(root: DocType) -> None:
+    """Compute all lazily derived values of all items under `root`, so that they become part of the snapshot."""
+    for item in root.walk_items():
+        for attr in [*type(item)._properties(), "fingerprint"]:
+            getattr(item, attr)
+
+
+def save(path: str, key: str, payload: Any) -> None:
+    """Write `payload` (usually containing a [materialized][mkdocstrings_handlers.crystal.snapshot.materialize] doc tree) to the file at `path`.
+
+    Params:
+        key: An identifier of the inputs that the payload was derived from, to be checked by `load`.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file first, so a concurrent reader never sees a partial snapshot.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickler.dump(key)
+            pickler.dump(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    log.debug("Saved a snapshot of the doc tree to %r", path)
+
+
+def load(path: str, key: str) -> Any | None:
+    """Read back the payload that was saved to `path`, if it was saved with the same `key`.
+
+    Returns:
+        The payload, or `None` if the file doesn't exist or is outdated.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        try:
+            # An empty file (e.g. a write that got interrupted) can't be mapped, that's also covered here.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, _gc_disabled():
+                unpickler = pickle.Unpickler(mm)
+                if unpickler.load() != key:
+                    log.debug("The snapshot %r is outdated", path)
+                    return None
+                payload = unpickler.load()
+        except Exception as e:
+            log.warning("Failed to load the snapshot %r: %s", path, e)
+            return None
+    log.debug("Loaded a snapshot of the doc tree from %r", path)
+    return payload
+
+
+@contextlib.contextmanager
+def _gc_disabled() -> Generator[None]:
+    # Unpickling creates a lot of objects that are all going to survive anyway.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,151 @@
+"""Extracting snippets of Crystal source code, for showing the definitions of items inline."""
+
+from __future__ import annotations
+
+import array
+import mmap
+import os
+import re
+import textwrap
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .items import DocLocation
+
+MAX_LINES = 500
+"""Snippets longer than this many lines are cut off."""
+
+_NEWLINE = re.compile(rb"\n")
+_INDENT = re.compile(r"[ \t]*")
+_END = re.compile(r"end\b")
+_BLOCK_KEYWORD = re.compile(
+    r"((private|protected) +)?((abstract +)?(class|struct)|def|macro|module|enum|lib|annotation|union|fun)\b"
+)
+_BLOCK_DO = re.compile(r"\bdo( *\|[^|]*\|)?$")
+
+
+class SourceCache:
+    """A shared cache of source files that were opened so far.
+
+    Each file is memory-mapped and scanned for line breaks only once, no matter how many snippets are taken from it.
+    """
+
+    def __init__(self) -> None:
+        self._files: dict[str, _SourceFile | None] = {}
+
+    def get(self, filename: str) -> _SourceFile | None:
+        """The file by this path (relative to the current directory), or `None` if it doesn't exist."""
+        try:
+            return self._files[filename]
+        except KeyError:
+            pass
+        try:
+            f: _SourceFile | None = _SourceFile(filename)
+        except OSError:
+            f = None
+        self._files[filename] = f
+        return f
+
+    def snippet(self, location: DocLocation) -> str | None:
+        """The source code of the definition that starts at this location, dedented.
+
+        The end of a definition is found by the `end` keyword at the same indentation as its first line. If the first line doesn't begin a block (such as an abstract method or a `getter`), or there's no such `end` after it, it's the only line.
+
+        Returns:
+            The code, or `None` if the file isn't available.
+        """
+        f = self.get(location.filename)
+        if f is None or not 1 <= location.line <= f.line_count:
+            return None
+        end = _block_end(f, location.line, MAX_LINES)
+        return textwrap.dedent(f.lines(location.line, end))
+
+    def block_end(self, filename: str, line: int) -> int | None:
+        """The last line of the definition that starts at `line` of the file `filename`, found the same way as for a [snippet][mkdocstrings_handlers.crystal.sources.SourceCache.snippet].
+
+        Returns:
+            The line number, or `None` if the file isn't available.
+        """
+        f = self.get(filename)
+        if f is None or not 1 <= line <= f.line_count:
+            return None
+        return _block_end(f, line)
+
+    def stat(self, filename: str) -> tuple[int, int] | None:
+        """The modification time and size of the file as it was when first read."""
+        f = self.get(filename)
+        return f.stat if f is not None else None
+
+    def close(self) -> None:
+        for f in self._files.values():
+            if f is not None:
+                f.close()
+        self._files.clear()
+
+
+def file_stat(filename: str) -> tuple[int, int] | None:
+    """The current modification time and size of a file, to compare against `SourceCache.stat`."""
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _block_end(f: _SourceFile, start: int, max_lines: int | None = None) -> int:
+    first = f.line(start)
+    if not _opens_block(first):
+        return start
+    indent = len(_INDENT.match(first).group())  # type: ignore[union-attr]
+    last = f.line_count if max_lines is None else min(f.line_count, start + max_lines - 1)
+    for i in range(start + 1, last + 1):
+        line = f.line(i)
+        code = line.lstrip()
+        # Skip the body, as well as the closing parenthesis of parameters that span several lines.
+        if not code or code.startswith(("#", ")")) or len(line) - len(code) > indent:
+            continue
+        # The first line that's not nested in the definition has to be its `end`.
+        if len(line) - len(code) == indent and _END.match(code):
+            return i
+        return start
+    # Cut off, unless the file ended without an `end`.
+    return last if last < f.line_count else start
+
+
+def _opens_block(line: str) -> bool:
+    code = line.strip()
+    if code.endswith((" end", ";end")):
+        return False
+    # `abstract def` and declarations like `getter` don't have a body, but `record ... do` does.
+    return bool(_BLOCK_KEYWORD.match(code) or _BLOCK_DO.search(code))
+
+
+class _SourceFile:
+    def __init__(self, filename: str):
+        with open(filename, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.stat = (st.st_mtime_ns, st.st_size)
+            # Empty files can't be mapped.
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b""
+        # The offset of the start of each line, plus the end of the file.
+        self._offsets = array.array("q", [0])
+        self._offsets.extend(m.end() for m in _NEWLINE.finditer(self._mm))
+        if self._offsets[-1] != len(self._mm):
+            self._offsets.append(len(self._mm))
+
+    @property
+    def line_count(self) -> int:
+        return len(self._offsets) - 1
+
+    def line(self, n: int) -> str:
+        """The 1-based line `n`, without the line break."""
+        return self.lines(n, n).rstrip("\r\n")
+
+    def lines(self, start: int, end: int) -> str:
+        """The 1-based lines from `start` to `end` inclusive."""
+        data = self._mm[self._offsets[start - 1] : self._offsets[end]]
+        return data.decode(errors="replace")
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
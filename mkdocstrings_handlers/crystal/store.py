@@ -0,0 +1,211 @@
+"""Exporting the doc tree into an SQLite database, and reading it back lazily.
+
+This is for querying the API from other tools, without running `crystal docs` or keeping the whole tree in memory.
+
+The database has these tables:
+
+* `items` - every type, constant and method, with its `abs_id`, `kind`, `name`, `doc`, parent item, and its own part of the original JSON data (without the sub-items).
+* `locations` - the file and line of each definition (several for a type).
+* `edges` - relations between types: `superclass`, `ancestor`, `included_module`, `extended_module`, `subclass`, `including_type`.
+* `items_fts` - a full-text index of `abs_id`, `name` and `doc`.
+* `meta` - the `version` of *mkdocstrings-crystal* that wrote it, and the `fingerprint` of the root.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import os
+import pathlib
+import sqlite3
+from collections.abc import Generator, Iterator, Sequence
+from typing import Any, NamedTuple
+
+from .collector import DocRoot
+from .items import _SUB_ITEMS, DocItem, DocLocation, DocMethod, DocType
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE items (
+    id INTEGER PRIMARY KEY,
+    parent INTEGER REFERENCES items(id),
+    category TEXT,
+    position INTEGER,
+    kind TEXT NOT NULL,
+    abs_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    doc TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX items_abs_id ON items(abs_id);
+CREATE INDEX items_children ON items(parent, category, position);
+CREATE TABLE locations (item INTEGER REFERENCES items(id), filename TEXT, line INTEGER, url TEXT);
+CREATE INDEX locations_file ON locations(filename, line);
+CREATE TABLE edges (item INTEGER REFERENCES items(id), relation TEXT, target TEXT);
+CREATE INDEX edges_item ON edges(item, relation);
+CREATE INDEX edges_target ON edges(target, relation);
+CREATE VIRTUAL TABLE items_fts USING fts5(abs_id, name, doc, content='items', content_rowid='id');
+"""
+
+_EDGES = {
+    "superclass": "superclass",
+    "ancestor": "ancestors",
+    "included_module": "included_modules",
+    "extended_module": "extended_modules",
+    "subclass": "subclasses",
+    "including_type": "including_types",
+}
+
+
+def export(root: DocItem, filename: str) -> None:
+    """Write the whole tree under `root` into a new SQLite database at `filename` (replacing any existing file)."""
+    from . import __version__
+
+    tmp_filename = filename + ".tmp"
+    if os.path.exists(tmp_filename):
+        os.remove(tmp_filename)
+    conn = sqlite3.connect(tmp_filename)
+    try:
+        with conn:
+            conn.executescript(_SCHEMA)
+            items: list[tuple[Any, ...]] = []
+            locations: list[tuple[int, str, int, str | None]] = []
+            edges: list[tuple[int, str, str]] = []
+            walk = _walk(root, None, None, 0, itertools.count(1))
+            for item_id, parent_id, category, position, item in walk:
+                items.append(
+                    (
+                        item_id,
+                        parent_id,
+                        category,
+                        position,
+                        item.kind,
+                        item.abs_id,
+                        item.name,
+                        item.doc,
+                        json.dumps(_own_data(item)),
+                    )
+                )
+                locs: Sequence[DocLocation] = ()
+                if isinstance(item, DocType):
+                    locs = item.locations
+                elif isinstance(item, DocMethod) and item.location:
+                    locs = [item.location]
+                locations += ((item_id, loc.filename, loc.line, loc.url) for loc in locs)
+                if isinstance(item, DocType):
+                    for relation, attr in _EDGES.items():
+                        targets = getattr(item, attr)
+                        if not isinstance(targets, list):
+                            targets = [targets] if targets else []
+                        edges += ((item_id, relation, t.abs_id) for t in targets)
+
+            conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", items)
+            conn.executemany("INSERT INTO locations VALUES (?, ?, ?, ?)", locations)
+            conn.executemany("INSERT INTO edges VALUES (?, ?, ?)", edges)
+            conn.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("version", __version__), ("fingerprint", root.fingerprint)],
+            )
+    finally:
+        conn.close()
+    os.replace(tmp_filename, filename)
+
+
+@contextlib.contextmanager
+def load(filename: str) -> Generator[DocRoot]:
+    """Open a database written by `export`, as a doc tree, for use in a `with` block.
+
+    Only the root is read immediately. The sub-items of each type get read from the database the first time they're needed, so e.g. [`lookup`][mkdocstrings_handlers.crystal.items.DocItem.lookup] only reads the types along the path to the item. The database is closed at the end of the block, so only the items read by then remain usable.
+    """
+    with contextlib.closing(_connect(filename)) as conn:
+        (row_id, data) = conn.execute("SELECT id, data FROM items WHERE parent IS NULL").fetchone()
+        root = DocRoot(_LazyData(conn, row_id, json.loads(data)), None, None)
+        root.source_locations = []
+        yield root
+
+
+class SearchResult(NamedTuple):
+    abs_id: str
+    kind: str
+    snippet: str
+    """A part of the doc where the match was found, with the matched words wrapped in `<b>`."""
+
+
+def search(filename: str, query: str, limit: int = 20) -> list[SearchResult]:
+    """Find items by words in their doc, name or identifier, best matches first.
+
+    Params:
+        query: An [FTS5 query](https://www.sqlite.org/fts5.html#full_text_query_syntax), e.g. `json OR yaml`.
+    """
+    conn = _connect(filename)
+    try:
+        rows = conn.execute(
+            """
+            SELECT items.abs_id, items.kind, snippet(items_fts, 2, '<b>', '</b>', '...', 16)
+            FROM items_fts JOIN items ON items.id = items_fts.rowid
+            WHERE items_fts MATCH ? ORDER BY rank LIMIT ?
+            """,
+            (query, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [SearchResult(*row) for row in rows]
+
+
+def _connect(filename: str) -> sqlite3.Connection:
+    if not os.path.isfile(filename):
+        raise FileNotFoundError(filename)
+    # Quoted as a URI, so that characters like `?` and `#` in the path are taken literally.
+    uri = pathlib.Path(filename).absolute().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+def _walk(
+    item: DocItem, parent_id: int | None, category: str | None, position: int, ids: Iterator[int]
+) -> Iterator[tuple[int, int | None, str | None, int, DocItem]]:
+    item_id = next(ids)
+    yield item_id, parent_id, category, position, item
+    if isinstance(item, DocType):
+        for sub_category in _SUB_ITEMS:
+            for sub_position, sub in enumerate(getattr(item, sub_category)):
+                yield from _walk(sub, item_id, sub_category, sub_position, ids)
+
+
+def _own_data(item: DocItem) -> dict[str, Any]:
+    data = {k: v for k, v in item.data.items() if k not in _SUB_ITEMS}
+    # Keep the URLs as they were derived from `source_locations`.
+    if isinstance(item, DocType) and "locations" in data:
+        data["locations"] = [
+            {"filename": loc.filename, "line_number": loc.line, "url": loc.url}
+            for loc in item.locations
+        ]
+    elif isinstance(item, DocMethod) and (loc := item.location):
+        data["location"] = {"filename": loc.filename, "line_number": loc.line, "url": loc.url}
+    return data
+
+
+class _LazyData(dict):
+    """The data of one item, where the lists of sub-items get filled in from the database on first access."""
+
+    def __init__(self, conn: sqlite3.Connection, row_id: int, data: dict[str, Any]):
+        super().__init__(data)
+        self._conn = conn
+        self._row_id = row_id
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __missing__(self, key: str) -> list[_LazyData]:
+        if key not in _SUB_ITEMS:
+            raise KeyError(key)
+        rows = self._conn.execute(
+            "SELECT id, data FROM items WHERE parent = ? AND category = ? ORDER BY position",
+            (self._row_id, key),
+        )
+        self[key] = result = [_LazyData(self._conn, i, json.loads(data)) for i, data in rows]
+        return result
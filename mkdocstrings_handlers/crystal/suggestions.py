@@ -0,0 +1,87 @@
+"""Finding the identifiers that are the most similar to one that doesn't exist, for "did you mean" hints."""
+
+from __future__ import annotations
+
+import bisect
+import collections
+import difflib
+import heapq
+from collections.abc import Iterable, Sequence
+
+MIN_SIMILARITY = 0.6
+"""Names less similar than this (by [`difflib`'s ratio](https://docs.python.org/3/library/difflib.html#difflib.SequenceMatcher.ratio)) aren't suggested."""
+
+_CANDIDATES = 10
+_POSTINGS_BUDGET = 2000
+
+
+class TrigramIndex:
+    """An index of names by their trigrams (sequences of 3 characters) and by their prefixes.
+
+    A lookup visits only the postings of the rarest trigrams of the query (up to a budget), so it stays fast even when most names share some common part. The names with the most trigrams in common are then compared to the query precisely.
+    """
+
+    def __init__(self, names: Iterable[tuple[str, str]]):
+        """
+        Params:
+            names: Pairs of a name to match against and the identifier to suggest for it. An identifier can come under several names.
+        """
+        self._names: list[str] = []
+        self._lengths: list[int] = []
+        self._targets: list[str] = []
+        self._postings: dict[str, list[int]] = collections.defaultdict(list)
+        for name, target in names:
+            i = len(self._names)
+            self._names.append(name := _normalize(name))
+            self._targets.append(target)
+            grams = _trigrams(name)
+            self._lengths.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(i)
+        self._postings = dict(self._postings)
+        self._sorted = sorted((name, i) for i, name in enumerate(self._names))
+
+    def nearest(self, query: str, limit: int = 5) -> Sequence[str]:
+        """The identifiers whose names are the most similar to `query`, best first.
+
+        Names that `query` is a prefix of come first, then the most similar other ones.
+        """
+        query = _normalize(query)
+        result: dict[str, None] = {}
+
+        i = bisect.bisect_left(self._sorted, (query, -1))
+        for name, j in self._sorted[i : i + limit]:
+            if not name.startswith(query):
+                break
+            result[self._targets[j]] = None
+
+        grams = _trigrams(query)
+        counts: collections.Counter[int] = collections.Counter()
+        budget = _POSTINGS_BUDGET
+        for postings in sorted((self._postings.get(g, ()) for g in grams), key=len):
+            if budget <= 0:
+                break
+            counts.update(postings[:budget])
+            budget -= len(postings)
+
+        scored = []
+        matcher = difflib.SequenceMatcher(b=query)
+        # Prefer names with the most trigrams in common relative to their length (the Dice coefficient).
+        lengths = self._lengths
+        candidates = heapq.nlargest(_CANDIDATES, counts, key=lambda j: counts[j] / lengths[j])
+        for j in candidates:
+            matcher.set_seq1(self._names[j])
+            if (score := matcher.ratio()) >= MIN_SIMILARITY:
+                scored.append((score, j))
+        for _, j in heapq.nlargest(limit, scored):
+            result.setdefault(self._targets[j], None)
+        return list(result)[:limit]
+
+
+def _normalize(name: str) -> str:
+    return name.removeprefix("::").replace(" ", "").lower()
+
+
+def _trigrams(name: str) -> set[str]:
+    name = f"^{name}$"
+    return {name[i : i + 3] for i in range(len(name) - 2)}
@@ -0,0 +1,16 @@
+// Fill in the details of members (see the `lazy_members` option) when they're expanded.
+(() => {
+  // The fragments are in the same directory as this script.
+  const base = document.currentScript.src;
+  const fragments = {};
+  document.addEventListener("toggle", (event) => {
+    const details = event.target;
+    if (!details.open || details.dataset.fragment === undefined || details.dataset.loaded) return;
+    details.dataset.loaded = "true";
+    const url = new URL(`${details.dataset.fragment}.json`, base);
+    fragments[url] ??= fetch(url).then((response) => response.json());
+    fragments[url].then((members) => {
+      details.insertAdjacentHTML("beforeend", members[details.dataset.member]);
+    });
+  }, true);
+})();
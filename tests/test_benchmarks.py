@@ -0,0 +1,14 @@
+import pytest
+
+from benchmarks import __main__ as bench
+from benchmarks import synthetic
+
+
+@pytest.fixture(scope="module")
+def json_data():
+    return synthetic.generate_json(synthetic.Scale(types=8, methods=2, constants=1, doc_size=2))
+
+
+@pytest.mark.parametrize("name", list(bench._BENCHMARKS))
+def test_benchmark_runs(json_data, name):
+    bench._BENCHMARKS[name](json_data)()
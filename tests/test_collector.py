@@ -0,0 +1,357 @@
+import dataclasses
+import gzip
+import json
+import os
+import subprocess
+
+import pytest
+from mkdocs.exceptions import PluginError
+from mkdocstrings.handlers.base import CollectionError
+
+from benchmarks import harness, synthetic
+from mkdocstrings_handlers.crystal.collector import CrystalCollector
+
+
+@pytest.fixture
+def no_crystal(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError(f"Unexpected subprocess: {args}")
+
+    monkeypatch.setattr(subprocess, "Popen", fail)
+    monkeypatch.setattr(subprocess, "check_output", fail)
+
+
+@pytest.mark.parametrize("filename", ["docs.json", "docs.json.gz"])
+def test_replay(tmp_path, no_crystal, filename):
+    data = synthetic.generate(synthetic.SCALES["small"])
+    data["crystal_info"] = {"crystal_version": "1.2.3", "crystal_src": "lib/crystal"}
+    path = tmp_path / filename
+    with (gzip.open if filename.endswith(".gz") else open)(path, "wt") as f:
+        json.dump(data, f)
+
+    collector = CrystalCollector(
+        crystal_docs_file=str(path),
+        source_locations={"src": "https://example.org/{crystal_version}/{file}#L{line}"},
+        crystal_info={"crystal_src": "/usr/lib/crystal"},
+    )
+    typ = collector.root.lookup("Type0")
+    assert typ.locations[0].url == "https://example.org/1.2.3/type0.cr#L1"
+    # The config takes precedence over the recorded values.
+    assert collector._crystal_info.crystal_src == "/usr/lib/crystal"
+
+
+def test_replay_without_compiler(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    path = tmp_path / "docs.json"
+    path.write_text(json.dumps(synthetic.generate(synthetic.SCALES["small"])))
+
+    # The flags are ignored along with the compiler.
+    collector = CrystalCollector(
+        crystal_docs_file=str(path),
+        crystal_docs_flags=["{crystal_src}/foo.cr"],
+        source_locations={"src": "https://example.org/{crystal_version}/{file}#L{line}"},
+    )
+    with pytest.raises(PluginError, match=r"'crystal_version'.+`crystal_info`"):
+        collector.root.lookup("Type0").locations[0].url  # noqa: B018
+
+
+def _write_project(path, seed):
+    path.mkdir()
+    data = synthetic.generate(dataclasses.replace(synthetic.SCALES["small"], seed=seed))
+    (path / "docs.json").write_text(json.dumps(data))
+    return data
+
+
+def _all_types(data):
+    for typ in data.get("types", ()):
+        yield typ["full_name"]
+        yield from _all_types(typ)
+
+
+def test_multi_project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data_a = _write_project(tmp_path / "a", seed=1)
+    data_b = _write_project(tmp_path / "b", seed=2)
+    # A fake `crystal` executable that outputs the docs of the directory it's run in.
+    (tmp_path / "bin").mkdir()
+    (tmp_path / "bin" / "crystal").write_text("#!/bin/sh\ncat docs.json\n")
+    (tmp_path / "bin" / "crystal").chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path / "bin"), prepend=os.pathsep)
+
+    collector = CrystalCollector(
+        projects=[
+            {"directory": "a", "source_locations": {"src": "https://a/{file}"}},
+            {
+                "directory": "b",
+                "crystal_docs_file": "docs.json",
+                "source_locations": {"src": "https://b/{file}"},
+            },
+        ],
+        jobs=1,
+    )
+    root = collector.root
+
+    # The shared types are deduplicated.
+    assert [typ.abs_id for typ in root.types].count("Int32") == 1
+    assert {typ.abs_id for typ in root.walk_types()} == {*_all_types(data_a["program"])} | {
+        *_all_types(data_b["program"])
+    }
+
+    only_b = next(iter({*_all_types(data_b["program"])} - {*_all_types(data_a["program"])}))
+    typ = root.lookup(only_b)
+    assert typ.locations[0].filename.startswith("b/src/")
+    assert typ.locations[0].url.startswith("https://b/")
+    meth = next(iter(root.lookup("Type0").instance_methods))
+    assert meth.location.filename.startswith("a/src/")
+    assert meth.location.url.startswith("https://a/")
+
+
+def test_multi_project_order(tmp_path, no_crystal, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    small = synthetic.SCALES["small"]
+    # The second project has more types and methods, named in between the ones of the first.
+    for name, scale in {
+        "a": dataclasses.replace(small, types=3, methods=2),
+        "b": dataclasses.replace(small, types=12, methods=12),
+    }.items():
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "docs.json").write_text(json.dumps(synthetic.generate(scale)))
+
+    root = CrystalCollector(
+        projects=[
+            {"directory": "a", "crystal_docs_file": "docs.json"},
+            {"directory": "b", "crystal_docs_file": "docs.json"},
+        ]
+    ).root
+
+    assert "method_10" in [meth.name for meth in root.lookup("Type1").instance_methods]
+    # Only these are in both projects, so only their lists were merged.
+    for typ in [root, root.lookup("Type1")]:
+        names = [t.full_name for t in typ.types]
+        assert names == sorted(names)
+        names = [meth.name for meth in typ.instance_methods]
+        assert names == sorted(names)
+
+
+def test_snapshot(tmp_path, no_crystal):
+    data = synthetic.generate(synthetic.SCALES["small"])
+    data["crystal_info"] = {"crystal_version": "1.2.3"}
+    path = tmp_path / "docs.json"
+    path.write_text(json.dumps(data))
+
+    def make_collector():
+        return CrystalCollector(
+            crystal_docs_file=str(path),
+            source_locations={"src": "https://example.org/{crystal_version}/{file}"},
+            cache_dir=str(tmp_path / "cache"),
+        )
+
+    collector = make_collector()
+    fingerprint = collector.root.fingerprint
+    collector.teardown()
+    assert (tmp_path / "cache" / "doc-tree.pickle").is_file()
+
+    collector = make_collector()
+    root = collector.root
+    assert collector._pending_snapshot is None
+    assert root.fingerprint == fingerprint
+    meth = next(iter(root.lookup("Type0").instance_methods))
+    # Already materialized, nothing to compute.
+    assert {"location", "args_string"} <= vars(meth).keys()
+    assert meth.location.url == "https://example.org/1.2.3/type0.cr"
+    assert root.lookup("Type0") is meth.parent
+    assert root.source_locations is collector._source_locations
+    collector.teardown()
+
+    data["program"]["types"][-1]["doc"] = "Changed."
+    path.write_text(json.dumps(data))
+    collector = make_collector()
+    assert collector.root.fingerprint != fingerprint
+    assert collector._pending_snapshot is not None
+
+
+def test_snapshot_source_urls(tmp_path, no_crystal, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "docs.json"
+    path.write_text(json.dumps(synthetic.generate(synthetic.SCALES["small"])))
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "shard.yml").write_text("version: 1.0.0\n")
+    (tmp_path / "cache").mkdir()
+    # An empty file, as if writing it got interrupted.
+    (tmp_path / "cache" / "doc-tree.pickle").write_bytes(b"")
+
+    def make_collector():
+        return CrystalCollector(
+            crystal_docs_file=str(path),
+            source_locations={"src": "https://example.org/{shard_version}/{file}"},
+            cache_dir=str(tmp_path / "cache"),
+        )
+
+    collector = make_collector()
+    assert collector.root.lookup("Type0").locations[0].url == "https://example.org/1.0.0/type0.cr"
+    assert collector._pending_snapshot is not None
+    collector.teardown()
+
+    collector = make_collector()
+    assert collector.root.lookup("Type0")
+    assert collector._pending_snapshot is None
+
+    # Only the version of the shard changed, but it's part of the stored URLs.
+    (tmp_path / "src" / "shard.yml").write_text("version: 1.1.0\n")
+    collector = make_collector()
+    assert collector.root.lookup("Type0").locations[0].url == "https://example.org/1.1.0/type0.cr"
+    assert collector._pending_snapshot is not None
+
+
+def test_file_index(tmp_path, no_crystal, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = synthetic.generate(synthetic.SCALES["small"])
+    path = tmp_path / "docs.json"
+    path.write_text(json.dumps(data))
+    collector = CrystalCollector(crystal_docs_file=str(path))
+    root = collector.root
+
+    typ = root.lookup("Type0")
+    filename = typ.locations[0].filename
+    items = root.items_in_file(filename)
+    assert items[0] is typ
+    assert {*items[1:]} == {
+        *typ.constructors,
+        *typ.class_methods,
+        *typ.instance_methods,
+    }
+    lines = [item.location.line for item in items[1:]]
+    assert lines == sorted(lines)
+    assert root.items_in_file("nonexistent.cr") == ()
+
+    # Without the file, it's unknown where the definitions end.
+    other = root.items_in_file("src/string.cr")[1]
+    assert root.item_at(other.location.filename, other.location.line) is None
+
+    meth = items[3]
+    source = [f"class {typ.name}"]
+    for item in items[1:]:
+        source += [""] * (item.location.line - 1 - len(source))
+        source += [f"  def {item.name}", "    body", "  end"]
+    source.append("end")
+    (tmp_path / filename).parent.mkdir(parents=True)
+    (tmp_path / filename).write_text("\n".join(source))
+
+    assert root.item_at(filename, meth.location.line) is meth
+    assert root.item_at(filename, meth.location.line + 2) is meth
+    # Between the methods, only the type contains the line.
+    assert root.item_at(filename, meth.location.line + 3) is typ
+    assert root.item_at(filename, typ.locations[0].line) is typ
+    assert root.item_at(filename, len(source)) is typ
+    assert root.item_at(filename, len(source) + 1) is None
+    assert root.item_at(filename, 0) is None
+
+    # Each file was opened once for all of these, and is closed at the end of the build.
+    files = root._sources._files
+    assert [*files] == [other.location.filename, filename]
+    collector.teardown()
+    assert files == {}
+
+
+def test_versions_share_data():
+    data = synthetic.generate(synthetic.SCALES["small"])
+    old = json.loads(json.dumps(data))
+    typ = next(t for t in old["program"]["types"] if len(t.get("instance_methods", [])) > 1)
+    typ["instance_methods"][0]["doc"] += " Changed."
+
+    collector = CrystalCollector(
+        versions={
+            "latest": {"crystal_docs_file": harness.write_json(json.dumps(data).encode())},
+            "v1": {"crystal_docs_file": harness.write_json(json.dumps(old).encode())},
+        }
+    )
+    latest, v1 = collector.roots["latest"], collector.roots["v1"]
+    assert latest is collector.root
+
+    changed, orig = v1.lookup(typ["full_name"]), latest.lookup(typ["full_name"])
+    assert changed.data is not orig.data
+    assert list(changed.instance_methods)[1].data is list(orig.instance_methods)[1].data
+    other = next(t for t in v1.types if t.abs_id != typ["full_name"])
+    assert other.data is latest.lookup(other.abs_id).data
+
+    meth = next(iter(collector.collect(typ["full_name"], {"version": "v1"}).instance_methods))
+    assert meth.doc.endswith(" Changed.")
+    with pytest.raises(CollectionError, match="v2"):
+        collector.collect(typ["full_name"], {"version": "v2"})
+
+
+def test_collect_suggestions():
+    data = synthetic.generate(synthetic.SCALES["small"])
+    collector = CrystalCollector(crystal_docs_file=harness.write_json(json.dumps(data).encode()))
+    typ = next(t for t in data["program"]["types"] if t["name"].startswith("Type"))
+    misspelled = typ["full_name"].replace("Type", "Tpye")
+    with pytest.raises(CollectionError, match=f"did you mean '{typ['full_name']}'"):
+        collector.collect(misspelled, {})
+    with pytest.raises(CollectionError, match=r"can't find 'Zzzzzzzz'$"):
+        collector.collect("Zzzzzzzz", {})
+
+
+def test_prune():
+    data = synthetic.generate(synthetic.SCALES["small"])
+    unrelated = {**data["program"]["types"][0], "name": "Unrelated", "full_name": "Unrelated"}
+    unrelated.update(
+        types=[], subclasses=[], locations=[{"filename": "lib/x.cr", "line_number": 1}]
+    )
+    data["program"]["types"].append(unrelated)
+    full = harness.make_root(json.dumps(data).encode())
+
+    collector = CrystalCollector(
+        crystal_docs_file=harness.write_json(json.dumps(data).encode()),
+        prune={"namespaces": ["Type0"]},
+    )
+    root = collector.root
+    typ = root.lookup("Type0")
+    assert typ.fingerprint == full.lookup("Type0").fingerprint
+    assert [t.abs_id for t in typ.walk_types()] == [
+        t.abs_id for t in full.lookup("Type0").walk_types()
+    ]
+
+    # Types referenced by the kept ones remain as stubs.
+    refs = {
+        path
+        for t in [typ, *typ.walk_types()]
+        for meth in t.instance_methods
+        for _, _, path in meth.args_string.tokens
+        if not path.startswith("Type0")
+    }
+    assert refs
+    for path in refs:
+        ref = root.lookup(path)
+        assert (ref.abs_id, ref.doc, list(ref.instance_methods)) == (path, None, [])
+    with pytest.raises(CollectionError):
+        root.lookup("Unrelated")
+    assert not root.instance_methods
+
+    collector = CrystalCollector(
+        crystal_docs_file=harness.write_json(json.dumps(data).encode()),
+        prune={"files": ["^lib/"]},
+    )
+    assert collector.root.lookup("Unrelated").fingerprint == full.lookup("Unrelated").fingerprint
+    assert not any(t.instance_methods for t in collector.root.types if t.abs_id != "Unrelated")
+
+    with pytest.raises(PluginError, match="prune"):
+        CrystalCollector(crystal_docs_file="x.json", prune={"types": ["Type0"]})
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_prefetch(tmp_path, monkeypatch, prefetch):
+    _write_project(tmp_path / "a", seed=1)
+    monkeypatch.chdir(tmp_path / "a")
+    # A fake `crystal` executable that leaves a trace of having been run.
+    (tmp_path / "bin").mkdir()
+    (tmp_path / "bin" / "crystal").write_text("#!/bin/sh\ntouch ran\ncat docs.json\n")
+    (tmp_path / "bin" / "crystal").chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path / "bin"), prepend=os.pathsep)
+
+    collector = CrystalCollector(prefetch=prefetch)
+    if prefetch:
+        collector._results[0].result()
+    assert (tmp_path / "a" / "ran").exists() == prefetch
+
+    assert collector.collect("Type0", {}).abs_id == "Type0"
+    assert (tmp_path / "a" / "ran").exists()
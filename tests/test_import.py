@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+_DEFERRED = [
+    "difflib",
+    "gzip",
+    "markdown_callouts",
+    "mmap",
+    "msgspec",
+    "orjson",
+    "shlex",
+    "mkdocstrings_handlers.crystal.search",
+    "mkdocstrings_handlers.crystal.snapshot",
+    "mkdocstrings_handlers.crystal.sources",
+    "mkdocstrings_handlers.crystal.store",
+    "mkdocstrings_handlers.crystal.suggestions",
+]
+# Generous, as it's meant to catch things like a heavy import creeping in, not small fluctuations.
+_MAX_OWN_IMPORT_TIME = 0.03
+
+
+def _import_times(tmp_path):
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    env["PYTHONPYCACHEPREFIX"] = str(tmp_path)
+    cmd = [sys.executable, "-X", "importtime", "-c", "import mkdocstrings_handlers.crystal"]
+    # The first run only writes the bytecode, same as it would be in an installed package.
+    subprocess.run(cmd, env=env, check=True, capture_output=True)
+    out = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stderr
+    result = {}
+    for line in out.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            self_us, _, name = line.removeprefix("import time:").split("|")
+            result[name.strip()] = int(self_us) / 1e6
+    return result
+
+
+def test_import_time(tmp_path):
+    times = _import_times(tmp_path)
+    assert "mkdocstrings_handlers.crystal" in times
+    # `-X importtime` lists every module imported, so this also checks what gets pulled in.
+    assert [name for name in _DEFERRED if name in times] == []
+
+    own = {name: t for name, t in times.items() if name.startswith("mkdocstrings_handlers.")}
+    assert sum(own.values()) < _MAX_OWN_IMPORT_TIME, own
@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from benchmarks import harness, synthetic
+from mkdocstrings_handlers.crystal import inventory
+
+
+@pytest.fixture(scope="module")
+def json_data():
+    data = synthetic.generate(synthetic.SCALES["small"])
+    data["program"]["doc"] = 'Ünïcödé ☃ \U0001f600 "quotes" \\ and\ttabs'
+    return json.dumps(data).encode()
+
+
+@pytest.mark.parametrize("decoder", list(inventory.DECODERS))
+def test_decoder_parity(json_data, decoder):
+    assert inventory.loads(json_data, decoder) == json.loads(json_data)
+
+    expected = harness.make_root(json_data, "json")
+    root = harness.make_root(json_data, decoder)
+    assert root.fingerprint == expected.fingerprint
+    assert [repr(typ) for typ in root.walk_types()] == [repr(typ) for typ in expected.walk_types()]
+
+
+def test_default_decoder(json_data):
+    assert inventory.loads(json_data) == inventory.loads(json_data, "json")
+    assert list(inventory.DECODERS)[-1] == "json"
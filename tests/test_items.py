@@ -0,0 +1,103 @@
+import json
+import sys
+
+import pytest
+
+from benchmarks import harness, synthetic
+
+
+@pytest.fixture(scope="module")
+def json_data():
+    return synthetic.generate_json(synthetic.SCALES["small"])
+
+
+def test_fingerprint_stable(json_data):
+    root1 = harness.make_root(json_data)
+    root2 = harness.make_root(json_data)
+    # Materialize one of them differently first, it shouldn't matter.
+    list(root2.walk_types())
+    assert root1.fingerprint == root2.fingerprint
+    assert len({typ.fingerprint for typ in root1.walk_types()}) == len(list(root1.walk_types()))
+
+
+def test_fingerprint_change(json_data):
+    old = harness.make_root(json_data)
+    new = harness.make_root(json_data)
+    typ = next(typ for typ in new.walk_types() if typ.parent is not new and typ.instance_methods)
+    meth = next(iter(typ.instance_methods))
+    meth.data["doc"] += " Changed."
+
+    changed = {meth.abs_id}
+    parent = typ
+    while parent:
+        changed.add(parent.abs_id)
+        parent = parent.parent
+    for new_item in [new, *new.walk_types(), *typ.instance_methods]:
+        old_item = old.lookup("::" + new_item.abs_id) if new_item.parent else old
+        assert (old_item.fingerprint != new_item.fingerprint) == (new_item.abs_id in changed)
+
+
+def test_used_by(json_data):
+    root = harness.make_root(json_data)
+    methods = [
+        meth
+        for typ in [root, *root.walk_types()]
+        for meth in [*typ.constructors, *typ.class_methods, *typ.instance_methods]
+    ]
+    for typ in root.walk_types():
+        expected = [
+            meth
+            for meth in methods
+            if meth.parent is not typ
+            and any(path == typ.abs_id for _, _, path in meth.args_string.tokens)
+        ]
+        assert {*typ.used_by} >= {*expected}
+        assert len(typ.used_by) == len({*typ.used_by})
+    assert any(typ.used_by for typ in root.walk_types())
+
+
+def test_suggest(json_data):
+    root = harness.make_root(json_data)
+    typ = next(t for t in root.walk_types() if t.instance_methods and t.parent is not root)
+    meth = next(iter(typ.instance_methods))
+
+    assert root.suggest(typ.abs_id[:-1] + "x" + typ.abs_id[-1])[0] == typ.abs_id
+    assert root.suggest(typ.abs_id.lower())[0] == typ.abs_id
+    assert meth.abs_id in root.suggest(meth.abs_id.replace("_", ""))
+    # Also by the relative name, but always suggesting the absolute identifier.
+    assert meth.abs_id in root.suggest(meth.rel_id, limit=100)
+    assert root.suggest("Zzzzzzzz") == []
+    # The index is shared by the whole tree.
+    assert typ.suggest(typ.name) == root.suggest(typ.name)
+    assert "_suggestion_index" not in vars(typ)
+
+
+def test_suggest_top_level(json_data):
+    data = json.loads(json_data)
+    # Not sharing the names with any members of types.
+    data["program"]["instance_methods"][0]["name"] = "parse_options"
+    data["program"]["constants"][0]["name"] = "MAX_DEPTH"
+    root = harness.make_root(json.dumps(data).encode())
+    meth = next(iter(root.instance_methods))
+    const = next(iter(root.constants))
+
+    assert root.suggest("parse_optoins")[0] == meth.abs_id
+    assert root.suggest("MAX_DEPHT")[0] == const.abs_id
+    assert "" not in root.suggest("Top Level Namespace")
+
+
+def test_identifiers(json_data):
+    root = harness.make_root(json_data)
+    typ = next(t for t in root.walk_types() if t.instance_methods and t.parent is not root)
+    meth = next(iter(typ.instance_methods))
+    const = next(iter(typ.constants))
+
+    assert meth.abs_id == f"{typ.abs_id}#{meth.rel_id}"
+    assert const.abs_id == f"{typ.abs_id}::{const.rel_id}"
+    for item in (typ, meth, const):
+        # Computed once and interned, so equal identifiers across items are the same objects.
+        assert "abs_id" not in vars(item)
+        assert sys.intern(item.abs_id) is item.abs_id
+        assert sys.intern(item.rel_id) is item.rel_id
+    assert sys.intern(meth.short_name) is meth.short_name
+    assert root.lookup(meth.abs_id) is meth
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from benchmarks import synthetic
+from mkdocstrings_handlers.crystal import __main__ as cli
+from mkdocstrings_handlers.crystal import snapshot
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "api.json").write_text(json.dumps(synthetic.generate(synthetic.SCALES["small"])))
+    (tmp_path / "mkdocs.yml").write_text(
+        """
+site_name: Test
+plugins:
+  - mkdocstrings:
+      default_handler: crystal
+      handlers:
+        crystal:
+          crystal_docs_file: api.json
+          cache_dir: .cache
+"""
+    )
+    return tmp_path
+
+
+def test_warm(project, capsys, monkeypatch):
+    monkeypatch.setenv("PATH", str(project))
+    assert cli.main(["warm", "--json", "out.json"]) == 0
+    assert (project / ".cache" / snapshot.FILENAME).is_file()
+    assert any((project / ".cache" / "templates").iterdir())
+    out_data = json.loads((project / "out.json").read_text())
+    assert out_data.pop("crystal_info") == {}
+    assert out_data == json.loads((project / "api.json").read_text())
+
+    cli.main(["stats"])
+    out = capsys.readouterr().out
+    assert "(from the snapshot)" in out
+    assert "instance_method" in out
+
+
+def test_warm_replay(project, monkeypatch):
+    monkeypatch.setenv("PATH", str(project))
+    config = (project / "mkdocs.yml").read_text()
+    source_locations = """
+          source_locations:
+            src: https://example.org/{crystal_version}/{file}#L{line}
+"""
+    (project / "mkdocs.yml").write_text(
+        config + "          crystal_info: {crystal_version: 1.2.3}" + source_locations
+    )
+    cli.main(["warm", "--json", "out.json"])
+
+    # A later job without the compiler, and without the values in the config.
+    (project / "mkdocs.yml").write_text(
+        config.replace("api.json", "out.json").replace("cache_dir: .cache", "cache_dir: .cache2")
+        + source_locations
+    )
+    _, handler = cli._make_handler("mkdocs.yml")
+    typ = handler.root.lookup("Type0")
+    assert typ.locations[0].url == "https://example.org/1.2.3/type0.cr#L1"
+
+
+def test_dump(project, capsys):
+    cli.main(["dump", "--base-url", "https://example.org/api"])
+    lines = capsys.readouterr().out.splitlines()
+    assert "Type0\thttps://example.org/api/Type0.html" in lines
+    assert "Type0#method_0\thttps://example.org/api/Type0.html#method_0-instance-method" in lines
+
+    with pytest.raises(SystemExit, match="v1"):
+        cli.main(["dump", "--version", "v1"])
+
+
+def test_custom_templates(project):
+    (project / "templates" / "crystal" / "mkdocs").mkdir(parents=True)
+    (project / "templates" / "crystal" / "mkdocs" / "type.html").write_text("Custom")
+    config = (project / "mkdocs.yml").read_text()
+    config = config.replace(
+        "      default_handler:", "      custom_templates: templates\n      default_handler:"
+    )
+    (project / "mkdocs.yml").write_text(config)
+
+    _, handler = cli._make_handler("mkdocs.yml")
+    assert handler.env.get_template("type.html").render() == "Custom"
@@ -0,0 +1,70 @@
+import pytest
+
+from benchmarks import harness, synthetic
+from mkdocstrings_handlers.crystal import memory
+from mkdocstrings_handlers.crystal.items import DocMethod
+
+
+def _materialize(root):
+    for typ in [root, *root.walk_types()]:
+        typ.locations  # noqa: B018
+        for mapp in (typ.constants, typ.constructors, typ.class_methods, typ.instance_methods):
+            for item in mapp:
+                if isinstance(item, DocMethod):
+                    item.args_string  # noqa: B018
+                    item.location  # noqa: B018
+
+
+@pytest.fixture
+def root():
+    return harness.make_root(synthetic.generate_json(synthetic.SCALES["small"]))
+
+
+def test_measure_unmaterialized(root):
+    report = memory.measure(root)
+    assert report.items == 1
+    assert set(report.by_structure) == {"raw data", "items"}
+
+
+@pytest.mark.parametrize(
+    ("structure", "max_bytes_per_item"),
+    [
+        ("raw data", 2500),
+        ("items", 350),
+        ("search indexes", 250),
+        ("cached derived values", 800),
+        (None, 4000),
+    ],
+)
+def test_bytes_per_item(root, structure, max_bytes_per_item):
+    _materialize(root)
+    report = memory.measure(root)
+    assert report.items > 300
+
+    size = report.total if structure is None else report.by_structure[structure]
+    assert size / report.items < max_bytes_per_item
+    assert sum(report.by_kind.values()) == report.total
+
+
+def test_release_caches(root):
+    _materialize(root)
+    full = memory.measure(root, extra={"rendered": ["<p>x</p>" * 100]})
+    assert full.by_structure["rendered"] > 0
+
+    memory.release_caches(root)
+    released = memory.measure(root)
+    assert released.items == 1
+    assert set(released.by_structure) == {"raw data", "items"}
+
+    # Everything is still accessible.
+    assert root.lookup("Type0").abs_id == "Type0"
+
+
+def test_released_on_teardown():
+    handler = harness.make_handler(synthetic.generate_json(synthetic.SCALES["small"]))
+    handler.render(handler.collect("Type0", {}), {})
+    root = handler.root
+    assert memory.measure(root).items > 1
+
+    handler.teardown()
+    assert memory.measure(root).items == 1
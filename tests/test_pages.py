@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from benchmarks import harness, synthetic
+from mkdocstrings_handlers.crystal import pages
+
+
+@pytest.fixture
+def root():
+    data = synthetic.generate(synthetic.SCALES["small"])
+    # A stub without locations, such as the `prune` option leaves, with a real type nested in it.
+    stub = next(t for t in data["program"]["types"] if t.get("types"))
+    stub["locations"] = []
+    return harness.make_root(json.dumps(data).encode()), stub["full_name"]
+
+
+def _flatten(nav):
+    for page in nav:
+        yield page
+        yield from _flatten(page.children)
+
+
+def test_nested(root):
+    root, stub = root
+    all_pages, nav = pages.generate(root, "api")
+
+    types = [t for t in root.walk_types() if t.locations]
+    assert [p.item for p in all_pages] == types
+    assert list(_flatten(nav)) == all_pages
+    assert stub not in {p.item.abs_id for p in all_pages}
+
+    page = next(p for p in all_pages if p.children)
+    assert page.path == "api/" + page.item.abs_id.replace("::", "/") + ".md"
+    assert page.title == page.item.name
+    assert [p.item for p in page.children] == [t for t in page.item.types if t.locations]
+    # The types nested in the stub move up to where it would've been.
+    assert any(p.item.abs_id.startswith(stub + "::") for p in nav)
+
+
+def test_flat(root):
+    root, _ = root
+    all_pages, nav = pages.generate(root, layout="flat")
+    assert nav == all_pages
+    assert all(not p.children for p in nav)
+    assert all(p.title == p.item.abs_id for p in nav)
+    assert nav[0].path == nav[0].item.abs_id + ".md"
+
+
+def test_unknown_layout(root):
+    with pytest.raises(ValueError, match="Unknown layout 'tree'"):
+        pages.generate(root[0], layout="tree")
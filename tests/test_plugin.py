@@ -0,0 +1,107 @@
+import json
+from importlib.metadata import EntryPoint
+
+import pytest
+from mkdocs.commands.build import build
+from mkdocs.config import load_config
+from mkdocs.config.defaults import MkDocsConfig
+
+from benchmarks import synthetic
+from mkdocstrings_handlers.crystal.renderer import CrystalRenderer
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Not relying on the package's entry points being installed.
+    entry_point = EntryPoint(
+        "crystal-api", "mkdocstrings_handlers.crystal.plugin:CrystalApiPlugin", "mkdocs.plugins"
+    )
+    monkeypatch.setitem(MkDocsConfig.plugins.installed_plugins, "crystal-api", entry_point)
+
+    (tmp_path / "api.json").write_text(json.dumps(synthetic.generate(synthetic.SCALES["small"])))
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "index.md").write_text("See [Type0][].\n")
+    return tmp_path
+
+
+def _build(path, plugin_config):
+    (path / "mkdocs.yml").write_text(
+        f"""
+site_name: Test
+use_directory_urls: false
+repo_url: https://example.org/repo
+edit_uri: edit/master/docs/
+markdown_extensions: [toc]
+plugins:
+  - mkdocstrings:
+      default_handler: crystal
+      handlers:
+        crystal:
+          crystal_docs_file: api.json
+          source_locations:
+            src: https://example.org/src/{{file}}#L{{line}}
+  - crystal-api: {json.dumps(plugin_config)}
+"""
+    )
+    config = load_config(str(path / "mkdocs.yml"))
+    build(config)
+    plugin = config.plugins["crystal-api"]
+    return path / "site", {path: file.page for path, file in plugin._files.items()}
+
+
+def test_build(project):
+    site, pages = _build(project, {"directory": "api"})
+
+    page = pages["api/Type0.md"]
+    html = (site / "api" / "Type0.html").read_text()
+    assert '<h1 id="Type0"' in html
+    assert "https://example.org/src/" in html
+    assert page.toc.items[0].id == "Type0"
+    assert page.edit_url.startswith("https://example.org/src/")
+    # Cross-references from other pages lead to the generated pages.
+    assert 'href="api/Type0.html#Type0"' in (site / "index.html").read_text()
+
+    # Type0 has nested types, so it's the first page in its section, and they follow it.
+    section = page.parent
+    assert section.title == "Type0"
+    assert section.children[0] is page
+    assert section.children[1] is pages["api/Type0/Type1.md"]
+    assert page.next_page is section.children[1]
+    assert section.parent.title == "API"
+    assert section.parent.parent is None
+
+
+def test_build_one_batch(project, monkeypatch):
+    batches = []
+    orig_render_batch = CrystalRenderer.render_batch
+
+    def render_batch(self, items, *args, **kwargs):
+        batches.append(items := list(items))
+        return orig_render_batch(self, items, *args, **kwargs)
+
+    monkeypatch.setattr(CrystalRenderer, "render_batch", render_batch)
+    _, pages = _build(project, {})
+    assert [[item.abs_id for item in batch] for batch in batches] == [
+        [path.removesuffix(".md").replace("/", "::") for path in pages]
+    ]
+
+
+def test_build_flat(project):
+    site, pages = _build(project, {"layout": "flat", "nav_title": "Types"})
+    page = pages["Type0/Type1.md"]
+    assert page.title == "Type0::Type1"
+    assert page.parent.title == "Types"
+    assert page.previous_page is pages["Type0.md"]
+    assert (site / "Type0" / "Type1.html").is_file()
+
+
+def test_build_compact_constants(project):
+    (project / "docs" / "index.md").write_text("See [Type0::CONSTANT_1][].\n")
+    site, pages = _build(project, {"options": {"compact_constants": 1}})
+
+    assert 'href="Type0.html#Type0::CONSTANT_1"' in (site / "index.html").read_text()
+    assert '<tr id="Type0::CONSTANT_1"' in (site / "Type0.html").read_text()
+    toc_ids = [item.id for item in pages["Type0.md"].toc.items[0].children]
+    assert "Type0::CONSTANT_1" not in toc_ids
+    assert "Type0-constants" in toc_ids
@@ -0,0 +1,386 @@
+import json
+import re
+
+import pytest
+
+from benchmarks import harness, synthetic
+from mkdocstrings_handlers.crystal import renderer
+
+
+@pytest.fixture
+def data():
+    renderer._render_cache.clear()
+    yield synthetic.generate(synthetic.SCALES["small"])
+    renderer._render_cache.clear()
+
+
+def _render_all(data, **config):
+    config.setdefault("incremental", True)
+    handler = harness.make_handler(json.dumps(data).encode(), **config)
+    rendered = []
+    orig_render = handler._render
+
+    def _render(item, subconfig):
+        rendered.append(item.abs_id)
+        return orig_render(item, subconfig)
+
+    handler._render = _render  # type: ignore[method-assign]
+
+    result = {}
+    for typ in handler.root.types:
+        if typ.locations:
+            result[typ.abs_id] = handler.render(handler.collect(typ.abs_id, {}), {})
+            result[typ.abs_id, "headings"] = [h.get("id") for h in handler.get_headings()]
+    return result, set(rendered)
+
+
+def _types(data):
+    return [t for t in data["program"]["types"] if t["locations"]]
+
+
+def test_incremental_doc_change(data):
+    first, rendered = _render_all(data)
+    assert len(rendered) == len(_types(data))
+
+    second, rendered = _render_all(data)
+    assert rendered == set()
+    assert second == first
+
+    typ = next(t for t in _types(data) if t.get("instance_methods"))
+    typ["instance_methods"][0]["doc"] += " Changed."
+    third, rendered = _render_all(data)
+    assert rendered == {typ["full_name"]}
+    assert third == _render_all(data, incremental=False)[0]
+
+
+def test_incremental_lookup_change(data):
+    first, rendered = _render_all(data)
+    removed = next(t for t in _types(data) if not t.get("types"))
+    referencing = {
+        cached.dependencies.abs_id
+        for cached in renderer._render_cache.values()
+        if removed["full_name"] in cached.dependencies.lookups.values()
+    }
+    assert referencing
+
+    data["program"]["types"].remove(removed)
+    second, rendered = _render_all(data)
+    assert rendered == referencing - {removed["full_name"]}
+    assert second == _render_all(data, incremental=False)[0]
+
+
+def test_incremental_options_change(data, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "shard.yml").write_text("version: 1.0.0\n")
+    locations = {"src": "https://example.org/{shard_version}/{file}#L{line}"}
+    first, _ = _render_all(data, source_locations=locations)
+    assert "/1.0.0/" in first["Type0"]
+
+    (tmp_path / "src" / "shard.yml").write_text("version: 1.1.0\n")
+    second, rendered = _render_all(data, source_locations=locations)
+    assert len(rendered) == len(_types(data))
+    assert "/1.1.0/" in second["Type0"]
+
+    _, rendered = _render_all(data, source_locations={"src": "https://example.org/{file}"})
+    assert len(rendered) == len(_types(data))
+
+
+def test_not_incremental(data):
+    handler = harness.make_handler(json.dumps(data).encode())
+    handler.render(handler.collect(_types(data)[0]["full_name"], {}), {})
+    handler.teardown()
+    assert not renderer._render_cache
+
+
+def test_render_batch(data):
+    handler = harness.make_handler(json.dumps(data).encode(), incremental=False)
+    types = list(handler.root.walk_types())
+    results = handler.render_batch(types)
+
+    assert [r.item for r in results] == types
+    for result in results:
+        assert result.html == handler.render(handler.collect(result.item.abs_id, {}), {})
+        assert result.anchors == [h.attrib["id"] for h in handler.get_headings()]
+        assert result.anchors[0] == result.item.abs_id
+    assert handler.get_headings() == []
+
+    # The links in the details of members are relative to each item's own page.
+    typ = next(t for t in types if t.instance_methods)
+    [result] = handler.render_batch([typ], {"lazy_members": True}, page_urls={typ.abs_id: "x/"})
+    name = re.search(r'data-fragment="([^"]+)"', result.html)[1]
+    assert handler._fragments[name].page_url == "x/"
+
+
+def test_show_source(data, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    typ = next(t for t in _types(data) if t.get("instance_methods"))
+    filename = typ["locations"][0]["filename"]
+    lines = [f"class {typ['name']}"]
+    for meth in typ["instance_methods"]:
+        line = meth["location"]["line_number"]
+        lines += [""] * (line - 1 - len(lines))
+        lines += [f"  def {meth['name']}", f"    {meth['name']}_body", "  end"]
+    (tmp_path / filename).parent.mkdir(parents=True)
+    (tmp_path / filename).write_text("\n".join(lines))
+
+    def render():
+        handler = harness.make_handler(json.dumps(data).encode(), incremental=True)
+        html = handler.render(handler.collect(typ["full_name"], {}), {"show_source": True})
+        handler.teardown()
+        return html
+
+    html = render()
+    assert html.count('<details class="doc-source">') == len(typ["instance_methods"])
+    assert "method_0_body" in html
+    assert render() == html
+
+    # Changing only the source file still invalidates the cache.
+    (tmp_path / filename).write_text("\n".join(lines).replace("method_0_body", "changed"))
+    html = render()
+    assert "method_0_body" not in html
+    assert "changed" in html
+
+
+def test_used_by_section(data):
+    typ, other = [t for t in _types(data) if t["name"].startswith("Type")][:2]
+    meth = next(m for m in other["instance_methods"] if typ["full_name"] not in m["args_html"])
+    orig_args_html = meth["args_html"]
+    meth["args_html"] += f' : <a href="{typ["full_name"]}.html">{typ["full_name"]}</a>'
+
+    first, _ = _render_all(data)
+    html = first[typ["full_name"]]
+    assert "Used by" in html
+    meth_id = f"{other['full_name']}#{meth['name']}"
+    assert f'data-autorefs-optional="{meth_id}' in html
+
+    # Removing the reference from another type's method re-renders this type too.
+    meth["args_html"] = orig_args_html
+    second, rendered = _render_all(data)
+    assert {typ["full_name"], other["full_name"]} <= rendered
+    assert second == _render_all(data, incremental=False)[0]
+
+
+def test_versions(data):
+    old = json.loads(json.dumps(data))
+    typ = next(t for t in _types(data) if t.get("instance_methods"))
+    typ["instance_methods"][0]["doc"] += " Changed."
+
+    handler = harness.make_handler(
+        None,
+        versions={
+            "latest": {"crystal_docs_file": harness.write_json(json.dumps(data).encode())},
+            "v1": {"crystal_docs_file": harness.write_json(json.dumps(old).encode())},
+        },
+    )
+    rendered = []
+    orig_render = handler._render
+
+    def _render(item, subconfig):
+        rendered.append(item.abs_id)
+        return orig_render(item, subconfig)
+
+    handler._render = _render  # type: ignore[method-assign]
+
+    latest = {}
+    for t in _types(data):
+        latest[t["full_name"]] = handler.render(handler.collect(t["full_name"], {}), {})
+        handler.get_headings()
+    assert len(rendered) == len(latest)
+
+    rendered.clear()
+    for t in _types(old):
+        item = handler.collect(t["full_name"], {"version": "v1"})
+        assert handler.get_anchors(item) == (f"v1/{t['full_name']}",)
+        html = handler.render(item, {"version": "v1"})
+        ids = [h.get("id") for h in handler.get_headings()]
+        assert all(i.startswith("v1/") for i in ids)
+        if t["full_name"] != typ["full_name"]:
+            assert (
+                str(html).replace('="v1/', '="').replace('="#v1/', '="#') == latest[t["full_name"]]
+            )
+    # Only the type that differs between the versions had to be rendered again.
+    assert rendered == [typ["full_name"]]
+
+
+def test_versions_source_locations(data):
+    json_file = harness.write_json(json.dumps(data).encode())
+    handler = harness.make_handler(
+        None,
+        versions={
+            name: {
+                "crystal_docs_file": json_file,
+                "source_locations": {"src": f"https://x/blob/{ref}/src/{{file}}#L{{line}}"},
+            }
+            for name, ref in [("latest", "master"), ("v1", "v1.0")]
+        },
+    )
+    typ = next(t for t in _types(data) if t.get("instance_methods"))
+    htmls = {
+        version: handler.render(
+            handler.collect(typ["full_name"], {"version": version}), {"version": version}
+        )
+        for version in ["latest", "v1"]
+    }
+    assert "https://x/blob/master/src/" in htmls["latest"]
+    assert "https://x/blob/v1.0/src/" not in htmls["latest"]
+    assert "https://x/blob/v1.0/src/" in htmls["v1"]
+    assert "https://x/blob/master/src/" not in htmls["v1"]
+
+
+def test_compact_constants(data):
+    typ = next(t for t in _types(data) if t.get("constants"))
+    typ["constants"] = [
+        {
+            "id": f"C{i}",
+            "name": f"C{i}",
+            "value": str(i),
+            "doc": f"Doc of *C{i}*." if i % 2 else None,
+        }
+        for i in range(5)
+    ]
+    typ["constants"][3]["doc"] = "```\nunclosed"
+    handler = harness.make_handler(json.dumps(data).encode())
+    item = handler.collect(typ["full_name"], {})
+
+    html = handler.render(item, {"compact_constants": 4})
+    headings = handler.get_headings()
+    assert html.count("<tr id=") == 5
+    assert "<p>Doc of <em>C1</em>.</p>" in html
+    assert "unclosed" in html
+    const_ids = [f"{typ['full_name']}::C{i}" for i in range(5)]
+    assert [h.get("id") for h in headings if h.tag == "a"] == const_ids
+    assert not any(h.get("id") in const_ids for h in headings if h.tag != "a")
+
+    html = handler.render(item, {"compact_constants": 5})
+    headings = handler.get_headings()
+    assert "<tr id=" not in html
+    assert [h.get("id") for h in headings if h.get("id") in const_ids] == const_ids
+    assert all(h.tag != "a" for h in headings)
+
+
+def test_convert_markdown_bulk(data):
+    handler = harness.make_handler(json.dumps(data).encode())
+    items = [c for t in handler.root.types for c in t.constants]
+    calls = []
+    orig = handler.do_convert_markdown_ctx
+
+    def convert(text, *args):
+        calls.append(text)
+        return orig(text, *args)
+
+    handler.do_convert_markdown_ctx = convert  # type: ignore[method-assign]
+    expected = [convert(c.doc, handler.root, 2, "x") if c.doc else "" for c in items]
+    calls.clear()
+    assert handler.do_convert_markdown_bulk(items, handler.root, 2, "x") == expected
+    assert len(calls) == 1
+
+
+def test_lazy_members(data, tmp_path):
+    typ = next(t for t in _types(data) if t.get("instance_methods"))
+    meth = typ["instance_methods"][0]
+    meth["doc"] = "Lazily *loaded*.\n\n## Example\n\nDetails."
+    headings = []
+
+    def render():
+        handler = harness.make_handler(json.dumps(data).encode(), incremental=True)
+        html = handler.render(handler.collect(typ["full_name"], {}), {"lazy_members": True})
+        headings[:] = [h.get("id") for h in handler.get_headings()]
+        handler._write_fragments(str(tmp_path))
+        [fragment] = tmp_path.glob("*.json")
+        return html, fragment.stem, json.loads(fragment.read_text())
+
+    html, name, members = render()
+    meth_id = f"{typ['full_name']}#{meth['name']}"
+    assert f'id="{meth_id}' in html
+    assert "Lazily" not in html
+    # The heading from the doc is only in the fragment, so it's not among the page's anchors.
+    assert meth_id in headings
+    assert not any("example" in h for h in headings)
+    assert f'data-fragment="{name}" data-member="{meth_id}' in html
+    assert (tmp_path / "lazy_members.js").is_file()
+    assert "<p>Lazily <em>loaded</em>.</p>" in next(
+        v for k, v in members.items() if k.startswith(meth_id)
+    )
+
+    # The fragments are restored along with the cached HTML.
+    assert render() == (html, name, members)
+    assert meth_id in headings
+    assert not any("example" in h for h in headings)
+
+
+def test_lazy_members_on_several_pages(data, tmp_path):
+    typ = next(t for t in _types(data) if t.get("instance_methods"))
+    handler = harness.make_handler(json.dumps(data).encode())
+    names = []
+    for page_url in ("a/", "b/"):
+        handler._current_page_url = lambda page_url=page_url: page_url  # type: ignore[method-assign]
+        html = handler.render(handler.collect(typ["full_name"], {}), {"lazy_members": True})
+        names.append(re.search(r'data-fragment="([^"]+)"', html)[1])
+    assert names[0] != names[1]
+    assert [handler._fragments[n].page_url for n in names] == ["a/", "b/"]
+
+
+def test_template_bytecode_cache(data, tmp_path):
+    typ = _types(data)[0]
+    htmls = []
+    for _ in range(2):
+        handler = harness.make_handler(
+            json.dumps(data).encode(), cache_dir=str(tmp_path), incremental=False
+        )
+        htmls.append(handler.render(handler.collect(typ["full_name"], {}), {}))
+        handler.teardown()
+    assert len(list((tmp_path / "templates").iterdir())) == 5
+    assert htmls[0] == htmls[1]
+
+
+def test_legacy_custom_templates(data, tmp_path):
+    templates = tmp_path / "crystal" / "material"
+    templates.mkdir(parents=True)
+    # Overrides in the style from before the templates defined macros: included with context.
+    (templates / "method.html").write_text(
+        '<div class="my-method">{{ obj.short_name }}{% include "method_details.html" %}</div>'
+    )
+    (templates / "constant.html").write_text('<div class="my-constant">{{ obj.name }}</div>')
+    handler = harness.make_handler(json.dumps(data).encode(), custom_templates=str(tmp_path))
+    assert handler._legacy_templates == {"method.html", "constant.html"}
+    typ = next(t for t in handler.root.walk_types() if t.instance_methods and t.constants)
+
+    html = handler.render(handler.collect(typ.abs_id, {}), {"compact_constants": None})
+    for meth in typ.instance_methods:
+        assert f'<div class="my-method">{meth.short_name}\n<div class="doc doc-contents ">' in html
+    for const in typ.constants:
+        assert f'<div class="my-constant">{const.name}</div>' in html
+
+    html = handler.render(handler.collect(meth.abs_id, {}), {})
+    assert html.startswith(f'<div class="my-method">{meth.short_name}')
+
+
+def test_compact_html(data, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    typ = next(t for t in _types(data) if t.get("instance_methods"))
+    filename = typ["locations"][0]["filename"]
+    (tmp_path / filename).parent.mkdir(parents=True)
+    meth = typ["instance_methods"][0]
+    meth["location"]["line_number"] = 1
+    (tmp_path / filename).write_text("def foo\n  if x\n    1 +  2\n  end\nend\n")
+    handler = harness.make_handler(json.dumps(data).encode(), incremental=False)
+    item = handler.collect(typ["full_name"], {})
+
+    html = handler.render(item, {"show_source": True})
+    headings = [h.get("id") for h in handler.get_headings()]
+    compact = handler.render(item, {"show_source": True, "compact_html": True})
+    assert [h.get("id") for h in handler.get_headings()] == headings
+
+    assert len(compact) < len(html) * 0.85
+    assert 'class="doc ' not in compact
+    assert f'<div class="d dm dmi"><h4 id="{typ["full_name"]}#{meth["name"]}' in compact
+    assert "\n" not in compact.split("<pre", 1)[0]
+    # Pre-formatted source code keeps its whitespace, and the text is the same overall.
+    assert "1</span> <span" in html
+    assert "1 +  2" in re.sub(r"<[^>]*>", "", compact)
+    assert _text(compact) == _text(html)
+
+
+def _text(html):
+    return " ".join(re.sub(r"<[^>]*>", " ", html).split())
@@ -0,0 +1,50 @@
+import json
+
+from benchmarks import harness, synthetic
+from mkdocstrings_handlers.crystal import search
+
+
+def test_entries_and_merge(tmp_path):
+    root = harness.make_root(json.dumps(synthetic.generate(synthetic.SCALES["small"])).encode())
+    typ = next(t for t in root.types if t.instance_methods)
+    meth = next(iter(typ.instance_methods))
+    urls = {typ.abs_id: f"api/#{typ.abs_id}", meth.abs_id: f"api/#{meth.abs_id}"}
+    external = next(t for t in root.types if t is not typ)
+
+    def url_mapper(identifier):
+        if identifier == external.abs_id:
+            return f"https://example.org/api/#{identifier}"
+        return urls[identifier]
+
+    entries = list(search.entries(root, url_mapper))
+    assert [e["title"] for e in entries] == [typ.abs_id, meth.abs_id]
+    assert entries[1]["kind"] == "instance_method"
+    assert entries[1]["location"] == urls[meth.abs_id]
+
+    index_file = tmp_path / "search" / "search_index.json"
+    index_file.parent.mkdir()
+    index_file.write_text(
+        json.dumps(
+            {
+                "config": {"lang": ["en"]},
+                "docs": [
+                    {"location": "api/", "title": "API", "text": "blob " * 1000},
+                    {"location": "other/", "title": "Other", "text": "Other text"},
+                    {"location": f"api/#{typ.abs_id}", "title": typ.name, "text": "blob " * 1000},
+                ],
+            }
+        )
+    )
+    search.merge(str(tmp_path), entries)
+    index = json.loads(index_file.read_text())
+    assert index["config"] == {"lang": ["en"]}
+    assert [e["location"] for e in index["docs"]] == ["api/", "other/", *urls.values()]
+    assert [e["text"] for e in index["docs"][:2]] == ["", "Other text"]
+
+
+def test_summary():
+    assert search.summary(None) == ""
+    assert search.summary("First  line\ncontinued.\n\nSecond paragraph.") == "First line continued."
+    long = search.summary("word " * 100)
+    assert len(long) <= search.SUMMARY_LENGTH
+    assert long.endswith("word…")
@@ -0,0 +1,100 @@
+import textwrap
+
+import pytest
+
+from mkdocstrings_handlers.crystal import sources
+from mkdocstrings_handlers.crystal.items import DocLocation
+
+_SOURCE = """\
+class Foo
+  # Does foo.
+  def foo(x : Int32) : Int32
+    if x > 0
+      x
+    end
+  end
+
+  abstract def bar
+
+  getter baz : Int32
+  property qux = 5
+  record Point, x : Int32, y : Int32
+
+  def quux; end
+
+  macro corge
+    {{ 1 }}
+  end
+
+  record Line, a : Point do
+    def length
+      1
+    end
+  end
+end
+
+def unfinished(x)
+  x
+"""
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "foo.cr").write_text(_SOURCE)
+    (tmp_path / "src" / "empty.cr").write_text("")
+    cache = sources.SourceCache()
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize(
+    ("line", "expected"),
+    [
+        (1, _SOURCE[: _SOURCE.index("\ndef unfinished")]),
+        (
+            3,
+            """\
+            def foo(x : Int32) : Int32
+              if x > 0
+                x
+              end
+            end
+            """,
+        ),
+        (9, "abstract def bar\n"),
+        (11, "getter baz : Int32\n"),
+        (12, "property qux = 5\n"),
+        (13, "record Point, x : Int32, y : Int32\n"),
+        (15, "def quux; end\n"),
+        (17, "macro corge\n  {{ 1 }}\nend\n"),
+        (21, "record Line, a : Point do\n  def length\n    1\n  end\nend\n"),
+        # No matching `end` at all.
+        (28, "def unfinished(x)\n"),
+    ],
+)
+def test_snippet(cache, line, expected):
+    location = DocLocation("src/foo.cr", line, None)
+    assert cache.snippet(location) == textwrap.dedent(expected)
+
+
+def test_snippet_unavailable(cache):
+    assert cache.snippet(DocLocation("src/missing.cr", 1, None)) is None
+    assert cache.snippet(DocLocation("src/empty.cr", 1, None)) is None
+    assert cache.snippet(DocLocation("src/foo.cr", 100, None)) is None
+
+
+def test_file_indexed_once(cache):
+    first = cache.get("src/foo.cr")
+    for line in (3, 9, 11):
+        cache.snippet(DocLocation("src/foo.cr", line, None))
+    assert cache.get("src/foo.cr") is first
+    assert cache.stat("src/foo.cr") == sources.file_stat("src/foo.cr")
+
+
+def test_block_end(cache):
+    assert cache.block_end("src/foo.cr", 1) == 26
+    assert cache.block_end("src/foo.cr", 3) == 7
+    assert cache.block_end("src/foo.cr", 9) == 9
+    assert cache.block_end("src/missing.cr", 1) is None
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from benchmarks import harness, synthetic
+from mkdocstrings_handlers.crystal import store
+from mkdocstrings_handlers.crystal.items import _SUB_ITEMS
+
+
+@pytest.fixture(scope="module")
+def root():
+    return harness.make_root(synthetic.generate_json(synthetic.SCALES["small"]))
+
+
+@pytest.fixture(scope="module")
+def db(root, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("store") / "docs.sqlite")
+    store.export(root, path)
+    return path
+
+
+def test_roundtrip(root, db):
+    with store.load(db) as loaded:
+        assert loaded.fingerprint == root.fingerprint
+        assert [repr(t) for t in loaded.walk_types()] == [repr(t) for t in root.walk_types()]
+
+    with store.load(db) as loaded:
+        pass
+    # The database is closed, so nothing more can be read.
+    with pytest.raises(sqlite3.ProgrammingError):
+        loaded.lookup("Type0")
+
+
+def test_special_path(root, tmp_path):
+    path = str(tmp_path / "a?b#c%20d.sqlite")
+    store.export(root, path)
+    with store.load(path) as loaded:
+        assert loaded.fingerprint == root.fingerprint
+
+
+def test_lazy_lookup(root, db):
+    with store.load(db) as loaded:
+        _check_lazy_lookup(root, loaded)
+
+
+def _check_lazy_lookup(root, loaded):
+    deep = next(t for t in root.walk_types() if t.abs_id.count("::") == 1 and t.instance_methods)
+    meth = next(iter(deep.instance_methods))
+
+    found = loaded.lookup(meth.abs_id)
+    parent = loaded.lookup(deep.abs_id.split("::")[0])
+    # Only the types along the path were read. (Check this before any `assert` shows their repr.)
+    read = {t.abs_id: {*t.data} & {*_SUB_ITEMS} for t in loaded.types if "types" in t.data}
+    assert read == {parent.abs_id: {"types", "constants"}}
+
+    assert found.abs_id == meth.abs_id
+    assert found.doc == meth.doc
+    assert found.location == meth.location
+
+
+def test_search(root, db):
+    meth = next(iter(root.lookup("Type0").instance_methods))
+    word = next(w for w in meth.doc.split() if w.isalpha() and len(w) > 3)
+    results = store.search(db, f'"{word}"')
+    assert results
+    assert all(word in r.snippet for r in results)
+    assert store.search(db, "Type0")[0].abs_id == "Type0"